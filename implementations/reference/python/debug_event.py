@@ -1,12 +1,8 @@
 #!/usr/bin/env python3
 
 import json
-import sys
 import os
 
-# Add the current directory to Python path so we can import domp
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
-
 from domp.validation import validate_event
 from domp.crypto import verify_event, compute_event_id
 
@@ -8,10 +8,30 @@ Built on Bitcoin Lightning Network and Nostr protocol.
 __version__ = "0.1.0"
 __author__ = "DOMP Protocol Contributors"
 
+from importlib import import_module
+
 from .events import Event, ProductListing, BidSubmission, BidAcceptance, PaymentConfirmation, ReceiptConfirmation
 from .crypto import KeyPair, sign_event, verify_event
-from .validation import validate_event, validate_event_chain
-from .client import DOMPClient
+
+# Exports whose modules are slow to import (jsonschema, aiohttp/websockets) are
+# loaded on first attribute access (PEP 562), so importing e.g. domp.reputation
+# does not pay for the network client.
+_LAZY_EXPORTS = {
+    "validate_event": ".validation",
+    "validate_event_chain": ".validation",
+    "validate_events_batch": ".validation",
+    "DOMPClient": ".client",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "Event",
@@ -25,5 +45,6 @@ __all__ = [
     "verify_event", 
     "validate_event",
     "validate_event_chain",
+    "validate_events_batch",
     "DOMPClient",
-]
\ No newline at end of file
+]
@@ -6,9 +6,23 @@ Provides typed event creation and manipulation.
 import time
 import json
 from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from .crypto import KeyPair, compute_event_id, sign_event
 
+try:
+    # Optional "speedups" extra; orjson.JSONDecodeError subclasses json.JSONDecodeError
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# Content field through which each event kind references the previous event in a chain
+REFERENCE_FIELDS = {
+    301: "product_ref",
+    303: "bid_ref",
+    311: "bid_ref",
+    313: "payment_ref",
+}
+
 
 @dataclass
 class Event:
@@ -30,7 +44,17 @@ class Event:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation."""
-        return asdict(self)
+        # Field-by-field rather than asdict(): tags is the only nested value and
+        # is a list of string lists, so a two-level copy is a full copy.
+        return {
+            "id": self.id,
+            "pubkey": self.pubkey,
+            "created_at": self.created_at,
+            "kind": self.kind,
+            "tags": [list(tag) for tag in self.tags],
+            "content": self.content,
+            "sig": self.sig,
+        }
     
     def to_json(self) -> str:
         """Convert to JSON string."""
@@ -44,19 +68,21 @@ class Event:
     @classmethod 
     def from_json(cls, json_str: str) -> 'Event':
         """Create event from JSON string."""
-        data = json.loads(json_str)
+        data = json_loads(json_str)
         return cls.from_dict(data)
     
     def sign(self, keypair: KeyPair) -> None:
         """Sign the event with given keypair."""
         self.pubkey = keypair.public_key_hex
         
-        # Compute event ID
-        event_data = self.to_dict()
-        event_data.pop('id', None)
-        event_data.pop('sig', None)
-        
-        self.id = compute_event_id(event_data)
+        # Compute event ID; the serializer only reads, so no copy of tags is needed
+        self.id = compute_event_id({
+            "pubkey": self.pubkey,
+            "created_at": self.created_at,
+            "kind": self.kind,
+            "tags": self.tags,
+            "content": self.content,
+        })
         
         # Sign the event
         self.sig = sign_event({"id": self.id}, keypair)
@@ -5,25 +5,45 @@ Handles HTLC creation, monitoring, and trustless payment flows.
 
 import asyncio
 import hashlib
+import heapq
+import inspect
+import itertools
 import secrets
 import time
 from typing import Dict, Any, Optional, Tuple, List
 from dataclasses import dataclass
-from enum import Enum
+from enum import IntEnum
 
 
-class EscrowState(Enum):
-    """Escrow transaction states."""
-    PENDING = "pending"
-    ACTIVE = "active"  
-    COMPLETED = "completed"
-    REFUNDED = "refunded"
-    EXPIRED = "expired"
+# hashlib's OpenSSL backend picks its SHA-256 implementation (SHA-NI, AVX2,
+# generic) from cpuid when libcrypto loads, so the fastest available code path
+# is already selected; bind the constructor once rather than resolving it on
+# every payment secret.
+_sha256 = hashlib.sha256
+
+
+class EscrowState(IntEnum):
+    """Escrow transaction states, encoded as small integer codes."""
+    PENDING = 0
+    ACTIVE = 1
+    COMPLETED = 2
+    REFUNDED = 3
+    EXPIRED = 4
+    
+    @property
+    def label(self) -> str:
+        """Lowercase state name used in summaries and API output."""
+        return self.name.lower()
 
 
 @dataclass
 class HTLCEscrow:
-    """HTLC-based escrow for DOMP transactions."""
+    """
+    HTLC-based escrow for DOMP transactions.
+    
+    LightningEscrowManager passes created_at and expires_at from a single
+    clock reading; escrows constructed directly fill in any missing one.
+    """
     
     # Transaction identifiers
     transaction_id: str
@@ -42,8 +62,8 @@ class HTLCEscrow:
     
     # State tracking
     state: EscrowState = EscrowState.PENDING
-    created_at: int = None
-    expires_at: int = None
+    created_at: Optional[int] = None
+    expires_at: Optional[int] = None
     
     # Lightning payment details
     buyer_payment_hash: Optional[str] = None
@@ -63,6 +83,16 @@ class LightningEscrowManager:
     def __init__(self):
         self.escrows: Dict[str, HTLCEscrow] = {}
         self.preimages: Dict[str, str] = {}  # payment_hash -> preimage
+        # Min-heap of (expires_at, seq, escrow) for escrows that went ACTIVE.
+        # Entries for escrows that later completed or were refunded are dropped
+        # lazily when they reach the top, as are entries whose escrow was
+        # replaced by a later create_escrow under the same transaction ID.
+        # seq keeps ties from comparing escrow objects.
+        self._active_heap: List[Tuple[int, int, "HTLCEscrow"]] = []
+        self._heap_seq = itertools.count()
+        # Number of tracked escrows currently ACTIVE, kept in step by
+        # _set_state and create_escrow
+        self._active_count = 0
     
     def generate_payment_secret(self) -> Tuple[str, str]:
         """
@@ -72,7 +102,7 @@ class LightningEscrowManager:
             Tuple of (preimage_hex, payment_hash_hex)
         """
         preimage = secrets.token_bytes(32)
-        payment_hash = hashlib.sha256(preimage).digest()
+        payment_hash = _sha256(preimage).digest()
         
         preimage_hex = preimage.hex()
         payment_hash_hex = payment_hash.hex()
@@ -108,7 +138,7 @@ class LightningEscrowManager:
         # Generate payment secret for this escrow
         preimage, payment_hash = self.generate_payment_secret()
         
-        escrow = HTLCEscrow(
+        escrow = self._make_escrow(
             transaction_id=transaction_id,
             buyer_pubkey=buyer_pubkey,
             seller_pubkey=seller_pubkey,
@@ -120,9 +150,34 @@ class LightningEscrowManager:
             timeout_blocks=timeout_blocks
         )
         
+        # A replaced escrow is no longer tracked, so it stops counting as active
+        replaced = self.escrows.get(transaction_id)
+        if replaced is not None and replaced.state == EscrowState.ACTIVE:
+            self._active_count -= 1
+        
         self.escrows[transaction_id] = escrow
         return escrow
     
+    @staticmethod
+    def _make_escrow(timeout_blocks: int, **fields: Any) -> HTLCEscrow:
+        """Construct an escrow with its timestamps computed from one clock read."""
+        now = int(time.time())
+        return HTLCEscrow(
+            timeout_blocks=timeout_blocks,
+            created_at=now,
+            expires_at=now + timeout_blocks * 600,  # ~10 min per block
+            **fields
+        )
+    
+    def _set_state(self, escrow: HTLCEscrow, state: EscrowState) -> None:
+        """Move an escrow to a new state, keeping the active count in step."""
+        self._active_count += (state == EscrowState.ACTIVE) - (escrow.state == EscrowState.ACTIVE)
+        escrow.state = state
+    
+    def active_escrow_count(self) -> int:
+        """Get the number of funded escrows awaiting release, refund or expiry."""
+        return self._active_count
+    
     def get_escrow(self, transaction_id: str) -> Optional[HTLCEscrow]:
         """Get escrow by transaction ID."""
         return self.escrows.get(transaction_id)
@@ -163,7 +218,9 @@ class LightningEscrowManager:
             required_payments.append(seller_collateral_hash)
         
         if all(payment for payment in required_payments):
-            escrow.state = EscrowState.ACTIVE
+            self._set_state(escrow, EscrowState.ACTIVE)
+            heapq.heappush(self._active_heap,
+                           (escrow.expires_at, next(self._heap_seq), escrow))
             return True
         
         return False
@@ -183,7 +240,7 @@ class LightningEscrowManager:
             return None
         
         # Mark as completed and return preimage
-        escrow.state = EscrowState.COMPLETED
+        self._set_state(escrow, EscrowState.COMPLETED)
         return escrow.payment_preimage
     
     def refund_payment(self, transaction_id: str) -> bool:
@@ -200,7 +257,7 @@ class LightningEscrowManager:
         if not escrow:
             return False
         
-        escrow.state = EscrowState.REFUNDED
+        self._set_state(escrow, EscrowState.REFUNDED)
         return True
     
     def check_timeouts(self) -> List[str]:
@@ -212,12 +269,24 @@ class LightningEscrowManager:
         """
         current_time = int(time.time())
         expired_transactions = []
-        
-        for transaction_id, escrow in self.escrows.items():
-            if (escrow.state == EscrowState.ACTIVE and 
-                current_time > escrow.expires_at):
-                escrow.state = EscrowState.EXPIRED
-                expired_transactions.append(transaction_id)
+        heap = self._active_heap
+        
+        # Only escrows whose deadline has passed are touched; completed and
+        # refunded entries, and entries for escrows since replaced under the
+        # same transaction ID, are discarded as they surface. A heap key can be
+        # stale if expires_at was changed after queuing, so the escrow's own
+        # deadline is checked again before it expires.
+        while heap and heap[0][0] < current_time:
+            _, _, escrow = heapq.heappop(heap)
+            if (escrow.state != EscrowState.ACTIVE
+                    or self.escrows.get(escrow.transaction_id) is not escrow):
+                continue
+            if current_time > escrow.expires_at:
+                self._set_state(escrow, EscrowState.EXPIRED)
+                expired_transactions.append(escrow.transaction_id)
+            else:
+                # Deadline was pushed back after the entry was queued
+                heapq.heappush(heap, (escrow.expires_at, next(self._heap_seq), escrow))
         
         return expired_transactions
     
@@ -235,9 +304,34 @@ class LightningEscrowManager:
         if not escrow:
             return None
         
+        return self._summarize_escrow(escrow, int(time.time()))
+    
+    def get_escrow_summaries(self, transaction_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get summaries for many escrows at once (e.g. for a dashboard).
+        
+        Args:
+            transaction_ids: Transaction identifiers, unknown IDs are skipped
+            
+        Returns:
+            List of escrow summaries in the order requested
+        """
+        now = int(time.time())
+        escrows = self.escrows
+        summarize = self._summarize_escrow
+        
+        return [
+            summarize(escrows[transaction_id], now)
+            for transaction_id in transaction_ids
+            if transaction_id in escrows
+        ]
+    
+    @staticmethod
+    def _summarize_escrow(escrow: HTLCEscrow, now: int) -> Dict[str, Any]:
+        """Build the summary dict for one escrow against a shared clock reading."""
         return {
             "transaction_id": escrow.transaction_id,
-            "state": escrow.state.value,
+            "state": escrow.state.label,
             "buyer": escrow.buyer_pubkey[:16] + "...",
             "seller": escrow.seller_pubkey[:16] + "...", 
             "purchase_amount_sats": escrow.purchase_amount_sats,
@@ -246,7 +340,7 @@ class LightningEscrowManager:
             "payment_hash": escrow.payment_hash,
             "created_at": escrow.created_at,
             "expires_at": escrow.expires_at,
-            "time_remaining": max(0, escrow.expires_at - int(time.time()))
+            "time_remaining": max(0, escrow.expires_at - now)
         }
 
 
@@ -306,37 +400,38 @@ class MockLightningNode:
             Payment hash of completed payment
         """
         # For mock purposes, allow paying any invoice if recipient_node is provided
-        if recipient_node and invoice in recipient_node.invoices:
-            invoice_data = recipient_node.invoices[invoice]
-        elif invoice in self.invoices:
-            invoice_data = self.invoices[invoice]
-        else:
+        invoice_data = recipient_node.invoices.get(invoice) if recipient_node else None
+        if invoice_data is None:
+            invoice_data = self.invoices.get(invoice)
+        if invoice_data is None:
             raise ValueError(f"Unknown invoice: {invoice}")
         
         if invoice_data["paid"]:
             raise ValueError(f"Invoice already paid: {invoice}")
         
-        if self.balance_sats < invoice_data["amount_sats"]:
+        amount_sats = invoice_data["amount_sats"]
+        if self.balance_sats < amount_sats:
             raise ValueError("Insufficient balance")
         
         # Deduct from payer balance
-        self.balance_sats -= invoice_data["amount_sats"]
+        self.balance_sats -= amount_sats
         
         # Add to recipient balance (if different node)
         if recipient_node and recipient_node != self:
-            recipient_node.balance_sats += invoice_data["amount_sats"]
+            recipient_node.balance_sats += amount_sats
         
-        # Mark invoice as paid
+        # Mark invoice as paid; the invoice and payment record share one timestamp
+        paid_at = int(time.time())
         invoice_data["paid"] = True
-        invoice_data["paid_at"] = int(time.time())
+        invoice_data["paid_at"] = paid_at
         
         # Record payment on both nodes
         payment_hash = invoice_data["payment_hash"]
         payment_record = {
             "invoice": invoice,
-            "amount_sats": invoice_data["amount_sats"],
+            "amount_sats": amount_sats,
             "preimage": preimage,
-            "paid_at": int(time.time())
+            "paid_at": paid_at
         }
         
         self.payments[payment_hash] = payment_record
@@ -398,6 +493,25 @@ def create_escrow_from_events(escrow_manager: LightningEscrowManager,
     return escrow
 
 
+def _invoice_requests(escrow: HTLCEscrow) -> List[Tuple[str, Dict[str, Any]]]:
+    """List the (invoice type, create_invoice kwargs) pairs an escrow needs."""
+    # Purchase amount invoice (with HTLC payment hash)
+    requests = [("purchase", {
+        "amount_sats": escrow.purchase_amount_sats,
+        "description": f"DOMP purchase - {escrow.transaction_id}",
+        "payment_hash": escrow.payment_hash
+    })]
+    
+    # Buyer collateral invoice (if required)
+    if escrow.buyer_collateral_sats > 0:
+        requests.append(("buyer_collateral", {
+            "amount_sats": escrow.buyer_collateral_sats,
+            "description": f"DOMP buyer collateral - {escrow.transaction_id}"
+        }))
+    
+    return requests
+
+
 def generate_lightning_invoices(escrow: HTLCEscrow, 
                                seller_node: MockLightningNode) -> Dict[str, str]:
     """
@@ -410,22 +524,52 @@ def generate_lightning_invoices(escrow: HTLCEscrow,
     Returns:
         Dictionary of invoice type -> invoice string
     """
-    invoices = {}
+    return {
+        invoice_type: seller_node.create_invoice(**kwargs)
+        for invoice_type, kwargs in _invoice_requests(escrow)
+    }
+
+
+async def generate_lightning_invoices_bulk(escrows: List[HTLCEscrow],
+                                          seller_node: MockLightningNode) -> Dict[str, Dict[str, str]]:
+    """
+    Generate Lightning invoices for a batch of DOMP escrows.
     
-    # Purchase amount invoice (with HTLC payment hash)
-    purchase_invoice = seller_node.create_invoice(
-        amount_sats=escrow.purchase_amount_sats,
-        description=f"DOMP purchase - {escrow.transaction_id}",
-        payment_hash=escrow.payment_hash
-    )
-    invoices["purchase"] = purchase_invoice
+    If the node's create_invoice is a coroutine (an RPC-backed node), every
+    invoice in the batch is requested concurrently, so the batch costs about
+    one round trip instead of one per invoice.
     
-    # Buyer collateral invoice (if required)
-    if escrow.buyer_collateral_sats > 0:
-        collateral_invoice = seller_node.create_invoice(
-            amount_sats=escrow.buyer_collateral_sats,
-            description=f"DOMP buyer collateral - {escrow.transaction_id}"
+    Args:
+        escrows: HTLC escrow objects
+        seller_node: Seller's Lightning node
+        
+    Returns:
+        Dictionary of transaction ID -> (invoice type -> invoice string)
+        
+    Raises:
+        ValueError: If two escrows in the batch share a transaction ID
+    """
+    seen = set()
+    for escrow in escrows:
+        if escrow.transaction_id in seen:
+            raise ValueError(f"Duplicate transaction ID in batch: {escrow.transaction_id}")
+        seen.add(escrow.transaction_id)
+    
+    requests = [
+        (escrow.transaction_id, invoice_type, kwargs)
+        for escrow in escrows
+        for invoice_type, kwargs in _invoice_requests(escrow)
+    ]
+    
+    if inspect.iscoroutinefunction(seller_node.create_invoice):
+        results = await asyncio.gather(
+            *(seller_node.create_invoice(**kwargs) for _, _, kwargs in requests)
         )
-        invoices["buyer_collateral"] = collateral_invoice
+    else:
+        results = [seller_node.create_invoice(**kwargs) for _, _, kwargs in requests]
+    
+    invoices: Dict[str, Dict[str, str]] = {escrow.transaction_id: {} for escrow in escrows}
+    for (transaction_id, invoice_type, _), invoice in zip(requests, results):
+        invoices[transaction_id][invoice_type] = invoice
     
-    return invoices
\ No newline at end of file
+    return invoices
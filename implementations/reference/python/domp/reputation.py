@@ -3,16 +3,30 @@ DOMP Reputation System
 Provides decentralized reputation scoring and verification for marketplace participants.
 """
 
-import json
+import math
+import os
+import sys
 import time
 import hashlib
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Mapping, Optional, Tuple, Any
+from dataclasses import dataclass
 from enum import Enum
-from collections import defaultdict
+from collections import Counter, defaultdict
+from collections.abc import Mapping as MappingABC
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 
 from .crypto import KeyPair
-from .events import Event
+from .events import REFERENCE_FIELDS, Event, json_loads
+
+# Upper bound of the signed 64-bit columns amounts and timestamps are stored in
+_INT64_MAX = 2 ** 63 - 1
+
+# Slotted dataclasses drop the per-instance __dict__; the flag needs Python 3.10+.
+# Shared with the other dataclass modules (e.g. the marketplace CLI).
+DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class ReputationMetric(Enum):
@@ -25,7 +39,7 @@ class ReputationMetric(Enum):
     PAYMENT_RELIABILITY = "payment_reliability"
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ReputationScore:
     """Individual reputation score from a transaction."""
     
@@ -52,13 +66,28 @@ class ReputationScore:
     
     def __post_init__(self):
         if self.review_timestamp == 0:
-            self.review_timestamp = int(time.time())
+            object.__setattr__(self, "review_timestamp", int(time.time()))
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # All fields are flat, so build the dict directly instead of via asdict()
+        return {
+            "transaction_id": self.transaction_id,
+            "reviewer_pubkey": self.reviewer_pubkey,
+            "reviewed_pubkey": self.reviewed_pubkey,
+            "overall_rating": self.overall_rating,
+            "item_quality": self.item_quality,
+            "shipping_speed": self.shipping_speed,
+            "communication": self.communication,
+            "payment_reliability": self.payment_reliability,
+            "transaction_amount_sats": self.transaction_amount_sats,
+            "review_timestamp": self.review_timestamp,
+            "review_text": self.review_text,
+            "verified_purchase": self.verified_purchase,
+            "escrow_completed": self.escrow_completed,
+        }
 
 
-@dataclass 
+@dataclass(**DATACLASS_SLOTS)
 class AggregatedReputation:
     """Aggregated reputation for a marketplace participant."""
     
@@ -95,163 +124,440 @@ class AggregatedReputation:
             self.review_concentration = min(self.review_concentration, 1.0)
 
 
+def _optional_rating(value: int) -> Optional[int]:
+    """Map the -1 "missing" marker used in rating columns back to None."""
+    return None if value < 0 else value
+
+
+class _ScoreArena:
+    """
+    Column-wise (structure-of-arrays) storage for every score in a system.
+    
+    Each attribute is a column indexed by row number, shared across all
+    reviewed users; ReputationSystem keeps the row numbers belonging to each
+    user. Numeric fields live in typed arrays, missing optional ratings are
+    stored as -1 and reviewers are interned to small integer ids, so no
+    ReputationScore object is kept per row.
+    """
+    
+    __slots__ = ("transaction_id", "amount", "timestamp", "overall", "item_quality",
+                 "shipping_speed", "communication", "payment_reliability", "verified",
+                 "escrow", "review_text", "reviewer_idx", "reviewer_ids", "reviewer_keys")
+    
+    def __init__(self):
+        self.transaction_id: List[str] = []
+        self.amount = array('q')
+        self.timestamp = array('q')
+        self.overall = array('b')
+        self.item_quality = array('b')
+        self.shipping_speed = array('b')
+        self.communication = array('b')
+        self.payment_reliability = array('b')
+        self.verified = array('b')
+        self.escrow = array('b')
+        self.review_text: List[str] = []
+        self.reviewer_idx = array('l')
+        self.reviewer_ids: Dict[str, int] = {}
+        self.reviewer_keys: List[str] = []
+    
+    def append(self, score: ReputationScore) -> int:
+        """
+        Append one score as a new row and return its row number.
+        
+        The append is atomic: if any column rejects a value, every column is
+        truncated back to its previous length before the error propagates.
+        """
+        row = len(self.transaction_id)
+        reviewer_idx = self.reviewer_ids.get(score.reviewer_pubkey)
+        new_reviewer = reviewer_idx is None
+        if new_reviewer:
+            reviewer_idx = self.reviewer_ids[score.reviewer_pubkey] = len(self.reviewer_keys)
+            self.reviewer_keys.append(score.reviewer_pubkey)
+        
+        try:
+            self.amount.append(score.transaction_amount_sats)
+            self.timestamp.append(score.review_timestamp)
+            self.overall.append(score.overall_rating)
+            self.item_quality.append(-1 if score.item_quality is None else score.item_quality)
+            self.shipping_speed.append(-1 if score.shipping_speed is None else score.shipping_speed)
+            self.communication.append(-1 if score.communication is None else score.communication)
+            self.payment_reliability.append(
+                -1 if score.payment_reliability is None else score.payment_reliability
+            )
+            self.verified.append(1 if score.verified_purchase else 0)
+            self.escrow.append(1 if score.escrow_completed else 0)
+            self.reviewer_idx.append(reviewer_idx)
+        except (OverflowError, TypeError):
+            self._truncate(row)
+            if new_reviewer:
+                del self.reviewer_ids[score.reviewer_pubkey]
+                self.reviewer_keys.pop()
+            raise
+        
+        # List appends cannot fail, so the row is complete once these run
+        self.review_text.append(score.review_text)
+        self.transaction_id.append(score.transaction_id)
+        return row
+    
+    def _truncate(self, length: int) -> None:
+        """Cut every typed column back to the given number of rows."""
+        for column in (self.amount, self.timestamp, self.overall, self.item_quality,
+                       self.shipping_speed, self.communication, self.payment_reliability,
+                       self.verified, self.escrow, self.reviewer_idx):
+            del column[length:]
+    
+    def materialize(self, row: int, reviewed_pubkey: str) -> ReputationScore:
+        """Rebuild the ReputationScore stored at a row."""
+        return ReputationScore(
+            transaction_id=self.transaction_id[row],
+            reviewer_pubkey=self.reviewer_keys[self.reviewer_idx[row]],
+            reviewed_pubkey=reviewed_pubkey,
+            overall_rating=self.overall[row],
+            item_quality=_optional_rating(self.item_quality[row]),
+            shipping_speed=_optional_rating(self.shipping_speed[row]),
+            communication=_optional_rating(self.communication[row]),
+            payment_reliability=_optional_rating(self.payment_reliability[row]),
+            transaction_amount_sats=self.amount[row],
+            review_timestamp=self.timestamp[row],
+            review_text=self.review_text[row],
+            verified_purchase=bool(self.verified[row]),
+            escrow_completed=bool(self.escrow[row])
+        )
+
+
+class _ScoresView(MappingABC):
+    """
+    Read-only, lazy view of a system's scores by reviewed pubkey.
+    
+    Each lookup materializes only that user's scores; unknown pubkeys raise
+    KeyError, so use .get(pubkey, []) where a missing user means no scores.
+    The lists are fresh copies, so mutating them does not change the system.
+    """
+    
+    __slots__ = ("_system",)
+    
+    def __init__(self, system: "ReputationSystem"):
+        self._system = system
+    
+    def __getitem__(self, pubkey: str) -> List[ReputationScore]:
+        if pubkey not in self._system._rows:
+            raise KeyError(pubkey)
+        return self._system.get_reputation_scores(pubkey)
+    
+    def __iter__(self):
+        return iter(self._system._rows)
+    
+    def __len__(self) -> int:
+        return len(self._system._rows)
+
+
+class _RunningTotals:
+    """
+    Running aggregates for one user, updated in O(1) per added score.
+    
+    Review timestamps are appended in arrival order and only sorted when the
+    recent-activity count needs them after an out-of-order review, so adding
+    a user's N reviews costs O(N log N) at worst rather than O(N^2).
+    
+    Decay weights are stored relative to ref_ts, the newest review seen so
+    far, so every stored exponent is <= 0. The weighted overall score is the
+    ratio weighted_overall / weight_sum, in which the common decay factor
+    between ref_ts and "now" cancels out; when a newer review arrives both
+    sums are rescaled onto the new reference with a single multiply.
+    """
+    
+    __slots__ = ("count", "amount_total", "first_ts", "last_ts", "timestamps", "ts_sorted",
+                 "verified", "escrow", "ref_ts", "weight_sum", "weighted_overall",
+                 "optional_sums", "optional_counts", "reviewers", "review_count_freq")
+    
+    def __init__(self):
+        self.count = 0
+        self.amount_total = 0
+        self.first_ts = 0
+        self.last_ts = 0
+        self.timestamps = array('q')
+        self.ts_sorted = True
+        self.verified = 0
+        self.escrow = 0
+        self.ref_ts = 0
+        self.weight_sum = 0.0
+        self.weighted_overall = 0.0
+        # item_quality, shipping_speed, communication, payment_reliability
+        self.optional_sums = [0, 0, 0, 0]
+        self.optional_counts = [0, 0, 0, 0]
+        self.reviewers: Counter = Counter()
+        # Histogram of reviews-per-reviewer: review count -> number of reviewers
+        self.review_count_freq: Counter = Counter()
+    
+    def sorted_timestamps(self) -> array:
+        """Return the review timestamps in ascending order, sorting if needed."""
+        if not self.ts_sorted:
+            self.timestamps = array('q', sorted(self.timestamps))
+            self.ts_sorted = True
+        return self.timestamps
+
+
 class ReputationSystem:
     """DOMP reputation aggregation and scoring system."""
     
+    _SECS_PER_DAY = 86400
+    _DAYS_PER_YEAR = 365
+    
     def __init__(self):
-        self.reputation_scores: Dict[str, List[ReputationScore]] = defaultdict(list)
         self.aggregated_reputation: Dict[str, AggregatedReputation] = {}
+        self._arena = _ScoreArena()
+        self._rows: Dict[str, array] = {}  # reviewed pubkey -> arena row numbers
+        self._running: Dict[str, _RunningTotals] = {}
+        # Time-independent part of each user's trust score, cleared on update
+        self._trust_base: Dict[str, float] = {}
         
         # Reputation algorithm parameters
         self.decay_factor = 0.95  # Older reviews count less
+        self._log_decay_per_sec = math.log(self.decay_factor) / self._SECS_PER_DAY
         self.min_reviews_for_reliability = 5
         self.volume_weight_factor = 0.1  # Weight based on transaction volume
         self.verified_purchase_bonus = 0.2  # Bonus for verified purchases
-        
+    
+    @property
+    def reputation_scores(self) -> Mapping[str, List[ReputationScore]]:
+        """Read-only view of stored scores by reviewed pubkey (see _ScoresView)."""
+        return _ScoresView(self)
+    
+    def get_reputation_scores(self, pubkey: str) -> List[ReputationScore]:
+        """Get the scores recorded for a user, in insertion order."""
+        rows = self._rows.get(pubkey, ())
+        return [self._arena.materialize(row, pubkey) for row in rows]
+    
     def add_reputation_score(self, score: ReputationScore) -> None:
         """Add a new reputation score."""
         pubkey = score.reviewed_pubkey
         
         # Validate score
-        if not self._validate_score(score):
-            raise ValueError("Invalid reputation score")
+        error = self._score_error(score)
+        if error:
+            raise ValueError(f"Invalid reputation score: {error}")
         
         # Add to scores
-        self.reputation_scores[pubkey].append(score)
+        self._store_score(score)
         
         # Update aggregated reputation
-        self._update_aggregated_reputation(pubkey)
+        self._update_aggregated_reputation(pubkey, int(time.time()))
+    
+    def add_reputation_scores(self, scores: List[ReputationScore]) -> None:
+        """
+        Add many reputation scores, refreshing each affected aggregate once.
+        
+        All scores are validated before any are stored, so an invalid score
+        leaves the system unchanged.
+        """
+        for score in scores:
+            error = self._score_error(score)
+            if error:
+                raise ValueError(f"Invalid reputation score: {error}")
+        
+        touched = {}
+        for score in scores:
+            self._store_score(score)
+            touched[score.reviewed_pubkey] = None
+        
+        now = int(time.time())
+        for pubkey in touched:
+            self._update_aggregated_reputation(pubkey, now)
+    
+    def _store_score(self, score: ReputationScore) -> None:
+        """Record a validated score and fold it into the running totals."""
+        pubkey = score.reviewed_pubkey
+        
+        row = self._arena.append(score)
+        rows = self._rows.get(pubkey)
+        if rows is None:
+            rows = self._rows[pubkey] = array('l')
+        rows.append(row)
+        
+        totals = self._running.get(pubkey)
+        if totals is None:
+            totals = self._running[pubkey] = _RunningTotals()
+        self._accumulate_score(totals, score)
     
     def _validate_score(self, score: ReputationScore) -> bool:
         """Validate reputation score parameters."""
+        return self._score_error(score) is None
+    
+    @staticmethod
+    def _score_error(score: ReputationScore) -> Optional[str]:
+        """
+        Describe why a score cannot be stored, or return None if it is valid.
+        
+        Ratings must be whole numbers and amounts/timestamps must fit in a
+        signed 64-bit integer, matching the typed columns scores are kept in.
+        """
         # Check rating bounds
-        if not (1 <= score.overall_rating <= 5):
-            return False
-        
-        # Check optional ratings
-        for rating in [score.item_quality, score.shipping_speed, 
-                      score.communication, score.payment_reliability]:
-            if rating is not None and not (1 <= rating <= 5):
-                return False
+        ratings = (
+            ("overall_rating", score.overall_rating),
+            ("item_quality", score.item_quality),
+            ("shipping_speed", score.shipping_speed),
+            ("communication", score.communication),
+            ("payment_reliability", score.payment_reliability),
+        )
+        for name, rating in ratings:
+            if rating is None and name != "overall_rating":
+                continue
+            if not isinstance(rating, int):
+                return f"{name} must be an integer"
+            if not (1 <= rating <= 5):
+                return f"{name} must be between 1 and 5"
         
         # Check transaction amount
-        if score.transaction_amount_sats < 0:
-            return False
+        amount = score.transaction_amount_sats
+        if not isinstance(amount, int):
+            return "transaction_amount_sats must be an integer"
+        if not (0 <= amount <= _INT64_MAX):
+            return "transaction_amount_sats out of range"
+        
+        # Check timestamp
+        timestamp = score.review_timestamp
+        if not isinstance(timestamp, int):
+            return "review_timestamp must be an integer"
+        if not (-_INT64_MAX - 1 <= timestamp <= _INT64_MAX):
+            return "review_timestamp out of range"
+        
+        return None
+    
+    def _accumulate_score(self, totals: _RunningTotals, score: ReputationScore) -> None:
+        """Fold one score into a user's running aggregates."""
+        timestamp = score.review_timestamp
+        log_decay_per_sec = self._log_decay_per_sec
         
-        return True
+        if totals.count == 0:
+            totals.first_ts = totals.last_ts = totals.ref_ts = timestamp
+        else:
+            if timestamp < totals.first_ts:
+                totals.first_ts = timestamp
+            if timestamp < totals.last_ts:
+                totals.ts_sorted = False
+            if timestamp > totals.last_ts:
+                totals.last_ts = timestamp
+            if timestamp > totals.ref_ts:
+                # Rebase the decayed sums onto the newer reference timestamp
+                scale = math.exp(log_decay_per_sec * (timestamp - totals.ref_ts))
+                totals.weight_sum *= scale
+                totals.weighted_overall *= scale
+                totals.ref_ts = timestamp
+        
+        totals.count += 1
+        totals.amount_total += score.transaction_amount_sats
+        totals.timestamps.append(timestamp)
+        # Flags count by truthiness, as the arena stores them
+        verified = 1 if score.verified_purchase else 0
+        escrow = 1 if score.escrow_completed else 0
+        totals.verified += verified
+        totals.escrow += escrow
+        
+        # Time decay (decay_factor ** days_old) relative to ref_ts, volume
+        # weight per 0.01 BTC, and verification bonus
+        weight = (math.exp(log_decay_per_sec * (totals.ref_ts - timestamp))
+                  * (1.0 + self.volume_weight_factor * (score.transaction_amount_sats / 1_000_000))
+                  * (1.0 + self.verified_purchase_bonus
+                     * (verified + escrow)))
+        totals.weight_sum += weight
+        totals.weighted_overall += score.overall_rating * weight
+        
+        for i, rating in enumerate((score.item_quality, score.shipping_speed,
+                                    score.communication, score.payment_reliability)):
+            if rating is not None:
+                totals.optional_sums[i] += rating
+                totals.optional_counts[i] += 1
+        
+        reviewer_count = totals.reviewers[score.reviewer_pubkey]
+        if reviewer_count:
+            freq = totals.review_count_freq
+            freq[reviewer_count] -= 1
+            if not freq[reviewer_count]:
+                del freq[reviewer_count]
+        totals.reviewers[score.reviewer_pubkey] = reviewer_count + 1
+        totals.review_count_freq[reviewer_count + 1] += 1
     
-    def _update_aggregated_reputation(self, pubkey: str) -> None:
-        """Update aggregated reputation for a user."""
-        scores = self.reputation_scores[pubkey]
+    def _update_aggregated_reputation(self, pubkey: str, now: Optional[int] = None) -> None:
+        """Update aggregated reputation for a user from their running totals."""
+        totals = self._running.get(pubkey)
         
-        if not scores:
+        if totals is None or not totals.count:
             return
         
+        if now is None:
+            now = int(time.time())
+        
         # Initialize aggregated reputation
         agg_rep = AggregatedReputation(pubkey=pubkey)
         
         # Calculate basic metrics
-        agg_rep.total_transactions = len(scores)
-        agg_rep.total_volume_sats = sum(s.transaction_amount_sats for s in scores)
+        agg_rep.total_transactions = totals.count
+        agg_rep.total_volume_sats = totals.amount_total
         
         # Time-based metrics
-        timestamps = [s.review_timestamp for s in scores]
-        agg_rep.first_transaction = min(timestamps)
-        agg_rep.last_transaction = max(timestamps)
+        agg_rep.first_transaction = totals.first_ts
+        agg_rep.last_transaction = totals.last_ts
         
         # Recent activity
-        thirty_days_ago = int(time.time()) - (30 * 24 * 3600)
-        agg_rep.transactions_last_30d = sum(1 for t in timestamps if t > thirty_days_ago)
+        thirty_days_ago = now - 30 * self._SECS_PER_DAY
+        timestamps = totals.sorted_timestamps()
+        agg_rep.transactions_last_30d = (
+            len(timestamps) - bisect_right(timestamps, thirty_days_ago)
+        )
         
         # Verification metrics
-        agg_rep.verified_purchases = sum(1 for s in scores if s.verified_purchase)
-        agg_rep.completed_escrows = sum(1 for s in scores if s.escrow_completed)
-        
-        # Calculate weighted averages
-        agg_rep.overall_score = self._calculate_weighted_average(
-            scores, lambda s: s.overall_rating
-        )
+        agg_rep.verified_purchases = totals.verified
+        agg_rep.completed_escrows = totals.escrow
         
-        # Optional metric averages
-        agg_rep.avg_item_quality = self._calculate_optional_average(
-            scores, lambda s: s.item_quality
-        )
-        agg_rep.avg_shipping_speed = self._calculate_optional_average(
-            scores, lambda s: s.shipping_speed
+        # Weighted overall score and optional metric averages
+        agg_rep.overall_score = (
+            totals.weighted_overall / totals.weight_sum if totals.weight_sum > 0 else 0.0
         )
-        agg_rep.avg_communication = self._calculate_optional_average(
-            scores, lambda s: s.communication
-        )
-        agg_rep.avg_payment_reliability = self._calculate_optional_average(
-            scores, lambda s: s.payment_reliability
+        (agg_rep.avg_item_quality,
+         agg_rep.avg_shipping_speed,
+         agg_rep.avg_communication,
+         agg_rep.avg_payment_reliability) = (
+            total / count if count else 0.0
+            for total, count in zip(totals.optional_sums, totals.optional_counts)
         )
         
         # Reviewer diversity
-        reviewers = [s.reviewer_pubkey for s in scores]
-        agg_rep.unique_reviewers = len(set(reviewers))
-        agg_rep.review_concentration = self._calculate_gini_coefficient(reviewers)
+        agg_rep.unique_reviewers = len(totals.reviewers)
+        agg_rep.review_concentration = self._calculate_gini_coefficient(
+            totals.review_count_freq
+        )
         
         # Store aggregated reputation
         self.aggregated_reputation[pubkey] = agg_rep
+        self._trust_base.pop(pubkey, None)
     
-    def _calculate_weighted_average(self, scores: List[ReputationScore], 
-                                  value_func) -> float:
-        """Calculate time-decay and volume-weighted average."""
-        current_time = int(time.time())
-        total_weight = 0.0
-        weighted_sum = 0.0
-        
-        for score in scores:
-            # Time decay weight
-            days_old = (current_time - score.review_timestamp) / (24 * 3600)
-            time_weight = self.decay_factor ** days_old
-            
-            # Volume weight (logarithmic scale)
-            volume_weight = 1.0 + (self.volume_weight_factor * 
-                                 (score.transaction_amount_sats / 1_000_000))  # Per 0.01 BTC
-            
-            # Verification bonus
-            verification_weight = 1.0
-            if score.verified_purchase:
-                verification_weight += self.verified_purchase_bonus
-            if score.escrow_completed:
-                verification_weight += self.verified_purchase_bonus
-            
-            # Combined weight
-            weight = time_weight * volume_weight * verification_weight
-            
-            total_weight += weight
-            weighted_sum += value_func(score) * weight
-        
-        return weighted_sum / total_weight if total_weight > 0 else 0.0
-    
-    def _calculate_optional_average(self, scores: List[ReputationScore],
-                                  value_func) -> float:
-        """Calculate average for optional metrics."""
-        values = [value_func(s) for s in scores if value_func(s) is not None]
-        return sum(values) / len(values) if values else 0.0
-    
-    def _calculate_gini_coefficient(self, reviewers: List[str]) -> float:
-        """Calculate Gini coefficient for review concentration."""
-        from collections import Counter
-        
-        if not reviewers:
+    def _calculate_gini_coefficient(self, review_count_freq: Dict[int, int]) -> float:
+        """
+        Calculate Gini coefficient for review concentration.
+        
+        Takes a histogram of review count -> number of reviewers. A run of m
+        reviewers sharing count c fills ranks r+1..r+m of the sorted counts, so
+        it adds c * (m*r + m*(m+1)/2) to the rank-weighted sum in one step.
+        """
+        n = 0
+        total = 0
+        cumsum = 0
+        for count in sorted(review_count_freq):
+            reviewers = review_count_freq[count]
+            cumsum += count * (reviewers * n + reviewers * (reviewers + 1) // 2)
+            n += reviewers
+            total += count * reviewers
+        
+        if not n:
             return 0.0
         
-        # Count reviews per reviewer
-        review_counts = list(Counter(reviewers).values())
-        review_counts.sort()
-        
-        n = len(review_counts)
-        cumsum = sum((i + 1) * count for i, count in enumerate(review_counts))
-        
-        return (2 * cumsum) / (n * sum(review_counts)) - (n + 1) / n
+        return (2 * cumsum) / (n * total) - (n + 1) / n
     
     def get_reputation(self, pubkey: str) -> Optional[AggregatedReputation]:
         """Get aggregated reputation for a user."""
         return self.aggregated_reputation.get(pubkey)
     
-    def get_reputation_summary(self, pubkey: str) -> Dict[str, Any]:
+    def get_reputation_summary(self, pubkey: str, now: Optional[int] = None) -> Dict[str, Any]:
         """Get human-readable reputation summary."""
         rep = self.get_reputation(pubkey)
         if not rep:
@@ -278,6 +584,9 @@ class ReputationSystem:
         elif rep.total_transactions > 0:
             reliability = "New Seller" if rep.total_transactions < 3 else "Limited Data"
         
+        if now is None:
+            now = int(time.time())
+        
         return {
             "pubkey": pubkey[:16] + "...",
             "overall_score": round(rep.overall_score, 2),
@@ -293,27 +602,77 @@ class ReputationSystem:
             "unique_reviewers": rep.unique_reviewers,
             "review_concentration": round(rep.review_concentration, 3),
             "recent_activity": rep.transactions_last_30d,
-            "account_age_days": (int(time.time()) - rep.first_transaction) // (24 * 3600) if rep.first_transaction else 0
+            "account_age_days": (now - rep.first_transaction) // self._SECS_PER_DAY if rep.first_transaction else 0
         }
     
-    def compare_sellers(self, pubkeys: List[str]) -> List[Dict[str, Any]]:
-        """Compare multiple sellers by reputation."""
-        summaries = []
+    def compare_sellers(self,
+                        pubkeys: List[str],
+                        top_k: Optional[int] = None,
+                        include_trust: bool = False) -> List[Dict[str, Any]]:
+        """
+        Compare multiple sellers by reputation.
+        
+        Sellers are ranked by their (summary-rounded) overall score before any
+        summary is built, so with top_k only the returned rows are materialized.
+        
+        Args:
+            pubkeys: Seller public keys to compare
+            top_k: Optional limit on the number of summaries returned
+            include_trust: Also add each seller's "trust_score", computed
+                against the same clock reading as the summaries
+            
+        Returns:
+            Reputation summaries, best overall score first
+        """
+        aggregated = self.aggregated_reputation
+        ranked = []
         for pubkey in pubkeys:
-            summary = self.get_reputation_summary(pubkey)
-            summaries.append(summary)
+            rep = aggregated.get(pubkey)
+            ranked.append((pubkey, round(rep.overall_score, 2) if rep else 0.0))
         
         # Sort by overall score (descending)
-        summaries.sort(key=lambda x: x["overall_score"], reverse=True)
-        
+        ranked.sort(key=itemgetter(1), reverse=True)
+        if top_k is not None:
+            ranked = ranked[:top_k]
+        
+        now = int(time.time())
+        summaries = [self.get_reputation_summary(pubkey, now) for pubkey, _ in ranked]
+        if include_trust:
+            for summary, (pubkey, _) in zip(summaries, ranked):
+                summary["trust_score"] = self.get_trust_score(pubkey, now)
         return summaries
     
-    def get_trust_score(self, pubkey: str) -> float:
+    def get_trust_score(self, pubkey: str, now: Optional[int] = None) -> float:
         """Calculate overall trust score (0-1) considering all factors."""
         rep = self.get_reputation(pubkey)
         if not rep:
             return 0.0
         
+        # Only the recency factor depends on the clock; the rest is cached
+        # until the user's aggregate changes
+        trust_base = self._trust_base.get(pubkey)
+        if trust_base is None:
+            trust_base = self._trust_base[pubkey] = self._calculate_trust_base(rep)
+        
+        # Recency factor
+        if rep.last_transaction > 0:
+            if now is None:
+                now = int(time.time())
+            days_since_last = (now - rep.last_transaction) / self._SECS_PER_DAY
+            recency_factor = max(0.1, 1.0 - (days_since_last / self._DAYS_PER_YEAR))  # Decay over a year
+        else:
+            recency_factor = 0.1
+        
+        return min(1.0, trust_base + recency_factor * 0.1)
+    
+    def get_trust_scores(self, pubkeys: List[str], now: Optional[int] = None) -> List[float]:
+        """Calculate trust scores for many users against a single clock reading."""
+        if now is None:
+            now = int(time.time())
+        return [self.get_trust_score(pubkey, now) for pubkey in pubkeys]
+    
+    def _calculate_trust_base(self, rep: AggregatedReputation) -> float:
+        """Weighted sum of the trust factors that do not depend on the current time."""
         # Base score from ratings
         base_score = rep.overall_score / 5.0
         
@@ -326,30 +685,27 @@ class ReputationSystem:
         # Diversity factor (low concentration is good)
         diversity_factor = 1.0 - rep.review_concentration
         
-        # Recency factor
-        if rep.last_transaction > 0:
-            days_since_last = (int(time.time()) - rep.last_transaction) / (24 * 3600)
-            recency_factor = max(0.1, 1.0 - (days_since_last / 365))  # Decay over a year
-        else:
-            recency_factor = 0.1
-        
         # Combine factors
-        trust_score = (
+        return (
             base_score * 0.4 +
             volume_factor * 0.2 +
             verification_rate * 0.2 +
-            diversity_factor * 0.1 +
-            recency_factor * 0.1
+            diversity_factor * 0.1
         )
-        
-        return min(1.0, trust_score)
 
 
 def create_reputation_from_receipt_confirmation(receipt_event: Dict[str, Any],
                                               transaction_context: Dict[str, Any] = None) -> ReputationScore:
     """Create reputation score from DOMP receipt confirmation event."""
-    content = json.loads(receipt_event["content"])
-    
+    return _reputation_from_receipt(
+        receipt_event, json_loads(receipt_event["content"]), transaction_context
+    )
+
+
+def _reputation_from_receipt(receipt_event: Dict[str, Any],
+                             content: Dict[str, Any],
+                             transaction_context: Dict[str, Any] = None) -> ReputationScore:
+    """Build a reputation score from a receipt event whose content is already parsed."""
     # Extract metrics from receipt confirmation
     overall_rating = content.get("rating", 5)
     item_quality = 5 if content.get("item_condition") == "as_described" else 3
@@ -376,29 +732,104 @@ def create_reputation_from_receipt_confirmation(receipt_event: Dict[str, Any],
     )
 
 
-def aggregate_marketplace_reputation(events: List[Dict[str, Any]]) -> Dict[str, AggregatedReputation]:
-    """Aggregate reputation from a list of DOMP events."""
-    reputation_system = ReputationSystem()
+def aggregate_marketplace_reputation(events: List[Dict[str, Any]],
+                                     max_workers: Optional[int] = None) -> Dict[str, AggregatedReputation]:
+    """
+    Aggregate reputation from a list of DOMP events.
+    
+    Each receipt confirmation (kind-313) is credited to the seller of the
+    listing at the root of its reference chain (313 -> 311 -> 303 -> 301 -> 300).
+    Events are indexed in a single pass, so they may appear in any order.
+    Events with malformed content and receipts that do not yield a valid
+    score are skipped rather than failing the whole aggregation.
     
-    # Extract transactions and their contexts
+    Args:
+        events: DOMP events, e.g. a relay archive
+        max_workers: If greater than 1, aggregate sellers in that many
+            worker processes (worthwhile for archives with many sellers)
+            
+    Returns:
+        Aggregated reputation by seller pubkey
+    """
+    # Single pass: index listings, reference links and receipts
     transactions = {}
+    parent_refs = {}
+    receipts = []
     
-    # First pass: collect transaction context
     for event in events:
-        if event["kind"] == 300:  # Product listing
-            content = json.loads(event["content"])
+        kind = event["kind"]
+        if kind not in REFERENCE_FIELDS and kind not in (300, 313):
+            continue
+        content = _parse_content(event)
+        if content is None:  # Malformed content: skip the event
+            continue
+        
+        if kind == 300:  # Product listing
             transactions[event["id"]] = {
                 "seller_pubkey": event["pubkey"],
                 "amount_sats": content.get("price_satoshis", 0)
             }
-        elif event["kind"] == 313:  # Receipt confirmation
-            content = json.loads(event["content"])
-            payment_ref = content.get("payment_ref")
-            if payment_ref in transactions:
-                # Create reputation score
-                reputation_score = create_reputation_from_receipt_confirmation(
-                    event, transactions[payment_ref]
-                )
-                reputation_system.add_reputation_score(reputation_score)
-    
-    return reputation_system.aggregated_reputation
\ No newline at end of file
+        elif kind == 313:  # Receipt confirmation
+            receipts.append((event, content))
+        else:  # Bid, acceptance, payment
+            ref = content.get(REFERENCE_FIELDS[kind])
+            if ref and isinstance(ref, str):
+                parent_refs[event["id"]] = ref
+    
+    # Resolve each receipt to its listing and build the scores
+    scores = []
+    for event, content in receipts:
+        ref = content.get("payment_ref")
+        if not isinstance(ref, str):
+            continue
+        for _ in range(len(REFERENCE_FIELDS)):
+            if ref is None or ref in transactions:
+                break
+            ref = parent_refs.get(ref)
+        
+        if ref in transactions:
+            score = _reputation_from_receipt(event, content, transactions[ref])
+            # Receipts with out-of-range or non-integer ratings are skipped,
+            # like events with malformed content
+            if ReputationSystem._score_error(score) is None:
+                scores.append(score)
+    
+    if not max_workers or max_workers <= 1:
+        return _aggregate_scores(scores)
+    
+    # Sellers aggregate independently: partition scores by seller, then hand
+    # each worker a chunk of sellers
+    by_seller: Dict[str, List[ReputationScore]] = defaultdict(list)
+    for score in scores:
+        by_seller[score.reviewed_pubkey].append(score)
+    
+    sellers = list(by_seller.values())
+    chunk_size = max(64, len(sellers) // (8 * (os.cpu_count() or 1)))
+    chunks = [
+        [score for seller_scores in sellers[i:i + chunk_size] for score in seller_scores]
+        for i in range(0, len(sellers), chunk_size)
+    ]
+    if len(chunks) <= 1:
+        return _aggregate_scores(scores)
+    
+    aggregated: Dict[str, AggregatedReputation] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_result in executor.map(_aggregate_scores, chunks):
+            aggregated.update(chunk_result)
+    return aggregated
+
+
+def _parse_content(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Parse an event's JSON content, returning None unless it is a JSON object."""
+    try:
+        content = json_loads(event["content"])
+    except (ValueError, TypeError):
+        return None
+    return content if isinstance(content, dict) else None
+
+
+def _aggregate_scores(scores: List[ReputationScore]) -> Dict[str, AggregatedReputation]:
+    """Aggregate a batch of scores in a fresh ReputationSystem (process pool worker)."""
+    reputation_system = ReputationSystem()
+    reputation_system.add_reputation_scores(scores)
+    return reputation_system.aggregated_reputation
@@ -6,20 +6,23 @@ Validates events against JSON schemas and protocol rules.
 import json
 import os
 import time
-from typing import Dict, Any, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pathlib import Path
 import jsonschema
 from .crypto import verify_event
+from .events import REFERENCE_FIELDS, json_loads
+
+
+# Specs directory (relative to this file); absent in distributed packages
+_SPECS_DIR = Path(__file__).parent.parent.parent.parent.parent / "specs" / "event-schemas"
 
 
 # Load JSON schemas
 def load_schemas() -> Dict[int, Dict[str, Any]]:
     """Load event schemas from specs directory."""
     schemas = {}
-    
-    # Find specs directory (relative to this file)
-    current_dir = Path(__file__).parent
-    specs_dir = current_dir.parent.parent.parent.parent / "specs" / "event-schemas"
+    specs_dir = _SPECS_DIR
     
     if not specs_dir.exists():
         # Fallback to embedded schemas for distribution
@@ -84,6 +87,38 @@ def _get_embedded_schemas() -> Dict[int, Dict[str, Any]]:
 
 SCHEMAS = load_schemas()
 
+# The embedded fallback schemas only restate the required fields, the kind and
+# the anti-spam tag, all of which _validate_event_structure and
+# _validate_anti_spam already enforce, so running jsonschema over them is skipped.
+_USING_EMBEDDED = not _SPECS_DIR.exists()
+
+# Compiled validators per event kind; each keeps the schema it was built from in .schema
+_SCHEMA_VALIDATORS: Dict[int, Any] = {}
+
+
+# Leading-zero prefixes for PoW checks, indexed by zero count (event IDs are 64 hex chars)
+_ZERO_PREFIXES = tuple('0' * i for i in range(65))
+
+# Parsed PoW requirement per difficulty tag value: (difficulty, required zeros,
+# required ID prefix or None if unsatisfiable). Networks use a handful of fixed
+# difficulties, so repeat events skip the parse; tag values are untrusted, so
+# the cache is bounded.
+_POW_REQUIREMENTS: Dict[str, Tuple[int, int, Optional[str]]] = {}
+_POW_REQUIREMENTS_MAX = 256
+
+
+# Required top-level event fields: (name, exact type, required length or None, error message)
+_REQUIRED_FIELDS = (
+    ("id", str, 64, "Invalid event ID format"),
+    ("pubkey", str, 64, "Invalid pubkey format"),
+    ("created_at", int, None, "created_at must be integer timestamp"),
+    ("kind", int, None, "kind must be integer"),
+    ("tags", list, None, "tags must be array"),
+    ("content", str, None, "content must be string"),
+    ("sig", str, 128, "Invalid signature format"),
+)
+_MISSING = object()
+
 
 class ValidationError(Exception):
     """Event validation error."""
@@ -104,6 +139,57 @@ def validate_event(event_data: Dict[str, Any], check_signature: bool = True) ->
     Raises:
         ValidationError: If event is invalid
     """
+    _validate_event(event_data, check_signature)
+    return True
+
+
+def validate_events_batch(events: List[Dict[str, Any]],
+                          check_signature: bool = True,
+                          max_workers: Optional[int] = None) -> List[Optional[ValidationError]]:
+    """
+    Validate many independent DOMP events, e.g. a relay subscription backlog.
+    
+    Structural, schema, content and anti-spam checks run first for every
+    event; signatures are then verified only for the events that passed,
+    optionally spread over a thread pool (libsecp256k1 runs outside the GIL).
+    
+    Args:
+        events: Events to validate
+        check_signature: Whether to verify cryptographic signatures
+        max_workers: Threads to use for signature verification (default: inline)
+        
+    Returns:
+        One entry per event: None if valid, otherwise the ValidationError
+        validate_event would have raised for it
+    """
+    errors: List[Optional[ValidationError]] = [None] * len(events)
+    pending = []
+    
+    for i, event in enumerate(events):
+        try:
+            _validate_event(event, check_signature=False)
+        except ValidationError as e:
+            errors[i] = e
+        else:
+            pending.append(i)
+    
+    if check_signature and pending:
+        to_verify = [events[i] for i in pending]
+        if max_workers and max_workers > 1 and len(to_verify) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(verify_event, to_verify))
+        else:
+            results = [verify_event(event) for event in to_verify]
+        
+        for i, valid in zip(pending, results):
+            if not valid:
+                errors[i] = ValidationError("Event validation failed: Invalid cryptographic signature")
+    
+    return errors
+
+
+def _validate_event(event_data: Dict[str, Any], check_signature: bool = True) -> Dict[str, Any]:
+    """Validate a DOMP event and return its parsed content."""
     try:
         # Basic structure validation
         _validate_event_structure(event_data)
@@ -112,7 +198,7 @@ def validate_event(event_data: Dict[str, Any], check_signature: bool = True) ->
         _validate_event_schema(event_data)
         
         # Content validation
-        _validate_event_content(event_data)
+        content = _validate_event_content(event_data)
         
         # Anti-spam validation
         _validate_anti_spam(event_data)
@@ -121,7 +207,7 @@ def validate_event(event_data: Dict[str, Any], check_signature: bool = True) ->
         if check_signature:
             _validate_signature(event_data)
             
-        return True
+        return content
         
     except Exception as e:
         raise ValidationError(f"Event validation failed: {str(e)}")
@@ -129,33 +215,13 @@ def validate_event(event_data: Dict[str, Any], check_signature: bool = True) ->
 
 def _validate_event_structure(event_data: Dict[str, Any]) -> None:
     """Validate basic event structure."""
-    required_fields = ["id", "pubkey", "created_at", "kind", "tags", "content", "sig"]
-    
-    for field in required_fields:
-        if field not in event_data:
+    # Exact type checks: decoded JSON never yields subclasses, and bool must not pass as int
+    for field, field_type, length, message in _REQUIRED_FIELDS:
+        value = event_data.get(field, _MISSING)
+        if value is _MISSING:
             raise ValidationError(f"Missing required field: {field}")
-    
-    # Validate field types
-    if not isinstance(event_data["id"], str) or len(event_data["id"]) != 64:
-        raise ValidationError("Invalid event ID format")
-        
-    if not isinstance(event_data["pubkey"], str) or len(event_data["pubkey"]) != 64:
-        raise ValidationError("Invalid pubkey format")
-        
-    if not isinstance(event_data["created_at"], int):
-        raise ValidationError("created_at must be integer timestamp")
-        
-    if not isinstance(event_data["kind"], int):
-        raise ValidationError("kind must be integer")
-        
-    if not isinstance(event_data["tags"], list):
-        raise ValidationError("tags must be array")
-        
-    if not isinstance(event_data["content"], str):
-        raise ValidationError("content must be string")
-        
-    if not isinstance(event_data["sig"], str) or len(event_data["sig"]) != 128:
-        raise ValidationError("Invalid signature format")
+        if type(value) is not field_type or (length is not None and len(value) != length):
+            raise ValidationError(message)
 
 
 def _validate_event_schema(event_data: Dict[str, Any]) -> None:
@@ -164,17 +230,39 @@ def _validate_event_schema(event_data: Dict[str, Any]) -> None:
     
     if kind not in SCHEMAS:
         raise ValidationError(f"Unsupported event kind: {kind}")
-        
-    try:
-        jsonschema.validate(event_data, SCHEMAS[kind])
-    except jsonschema.ValidationError as e:
-        raise ValidationError(f"Schema validation failed: {e.message}")
+    
+    if _USING_EMBEDDED:
+        return
+    
+    error = jsonschema.exceptions.best_match(_get_schema_validator(kind).iter_errors(event_data))
+    if error is not None:
+        raise ValidationError(f"Schema validation failed: {error.message}")
 
 
-def _validate_event_content(event_data: Dict[str, Any]) -> None:
-    """Validate event content field."""
+def _get_schema_validator(kind: int) -> Any:
+    """
+    Get the compiled validator for an event kind.
+    
+    jsonschema.validate() re-checks the schema against its metaschema and
+    builds a fresh validator on every call; this does both once per schema.
+    Schemas without a $schema key are treated as draft-07, the draft the
+    spec files are written against.
+    """
+    schema = SCHEMAS[kind]
+    cached = _SCHEMA_VALIDATORS.get(kind)
+    if cached is not None and cached.schema is schema:
+        return cached
+    
+    validator_cls = jsonschema.validators.validator_for(schema, default=jsonschema.Draft7Validator)
+    validator_cls.check_schema(schema)
+    validator = _SCHEMA_VALIDATORS[kind] = validator_cls(schema)
+    return validator
+
+
+def _validate_event_content(event_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate event content field and return the parsed content."""
     try:
-        content = json.loads(event_data["content"])
+        content = json_loads(event_data["content"])
     except json.JSONDecodeError:
         raise ValidationError("Content must be valid JSON")
     
@@ -190,6 +278,8 @@ def _validate_event_content(event_data: Dict[str, Any]) -> None:
         _validate_payment_confirmation_content(content)
     elif kind == 313:  # Receipt Confirmation
         _validate_receipt_confirmation_content(content)
+    
+    return content
 
 
 def _validate_product_listing_content(content: Dict[str, Any]) -> None:
@@ -277,14 +367,10 @@ def _validate_anti_spam(event_data: Dict[str, Any]) -> None:
     
     proof_type = anti_spam_tag[1]
     
-    if proof_type == "pow":
-        _validate_pow_proof(event_data, anti_spam_tag)
-    elif proof_type == "ln":
-        _validate_lightning_proof(anti_spam_tag)
-    elif proof_type == "ref":
-        _validate_reference_proof(anti_spam_tag)
-    else:
+    validator = _PROOF_VALIDATORS.get(proof_type)
+    if validator is None:
         raise ValidationError(f"Unknown anti-spam proof type: {proof_type}")
+    validator(event_data, anti_spam_tag)
 
 
 def _validate_pow_proof(event_data: Dict[str, Any], tag: List[str]) -> None:
@@ -292,20 +378,36 @@ def _validate_pow_proof(event_data: Dict[str, Any], tag: List[str]) -> None:
     if len(tag) < 4:
         raise ValidationError("PoW tag missing nonce or difficulty")
     
-    try:
-        difficulty = int(tag[3])
-    except ValueError:
-        raise ValidationError("PoW difficulty must be integer")
+    requirement = _POW_REQUIREMENTS.get(tag[3])
+    if requirement is None:
+        requirement = _parse_pow_requirement(tag[3])
+        if len(_POW_REQUIREMENTS) < _POW_REQUIREMENTS_MAX:
+            _POW_REQUIREMENTS[tag[3]] = requirement
+    difficulty, required_zeros, prefix = requirement
     
     # Check if event ID meets difficulty requirement
     event_id = event_data["id"]
-    required_zeros = difficulty // 4  # Each hex char = 4 bits
     
-    if not event_id.startswith('0' * required_zeros):
+    if prefix is None or not event_id.startswith(prefix):
         raise ValidationError(f"PoW does not meet difficulty {difficulty} (requires {required_zeros} leading zeros, got {event_id[:8]}...)")
 
 
-def _validate_lightning_proof(tag: List[str]) -> None:
+def _parse_pow_requirement(difficulty_tag: str) -> Tuple[int, int, Optional[str]]:
+    """Parse a PoW difficulty tag into (difficulty, required zeros, required ID prefix)."""
+    try:
+        difficulty = int(difficulty_tag)
+    except ValueError:
+        raise ValidationError("PoW difficulty must be integer")
+    
+    required_zeros = difficulty // 4  # Each hex char = 4 bits
+    if required_zeros <= 0:
+        return difficulty, required_zeros, ""
+    if required_zeros >= len(_ZERO_PREFIXES):
+        return difficulty, required_zeros, None
+    return difficulty, required_zeros, _ZERO_PREFIXES[required_zeros]
+
+
+def _validate_lightning_proof(event_data: Dict[str, Any], tag: List[str]) -> None:
     """Validate Lightning payment proof."""
     if len(tag) < 3:
         raise ValidationError("Lightning proof missing payment hash")
@@ -315,7 +417,7 @@ def _validate_lightning_proof(tag: List[str]) -> None:
         raise ValidationError("Invalid Lightning payment hash format")
 
 
-def _validate_reference_proof(tag: List[str]) -> None:
+def _validate_reference_proof(event_data: Dict[str, Any], tag: List[str]) -> None:
     """Validate event reference proof."""
     if len(tag) < 4:
         raise ValidationError("Reference proof missing event ID or kind")
@@ -325,6 +427,14 @@ def _validate_reference_proof(tag: List[str]) -> None:
         raise ValidationError("Invalid referenced event ID format")
 
 
+# Anti-spam proof validators by proof type (tag[1]); each takes (event_data, tag)
+_PROOF_VALIDATORS = {
+    "pow": _validate_pow_proof,
+    "ln": _validate_lightning_proof,
+    "ref": _validate_reference_proof,
+}
+
+
 def _validate_signature(event_data: Dict[str, Any]) -> None:
     """Validate cryptographic signature."""
     if not verify_event(event_data):
@@ -347,21 +457,21 @@ def validate_event_chain(events: List[Dict[str, Any]]) -> bool:
     if not events:
         raise ValidationError("Empty event chain")
     
-    # Validate individual events
-    for event in events:
-        validate_event(event)
+    # Validate individual events, keeping each parsed content for the checks below
+    contents = [_validate_event(event) for event in events]
     
     # Validate event sequence and references
-    _validate_event_sequence(events)
+    _validate_event_sequence(events, contents)
     
     # Validate state transitions
-    _validate_state_transitions(events)
+    _validate_state_transitions(events, contents)
     
     return True
 
 
-def _validate_event_sequence(events: List[Dict[str, Any]]) -> None:
-    """Validate event sequence and references."""
+def _validate_event_sequence(events: List[Dict[str, Any]],
+                             contents: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Validate event sequence and references, reusing parsed contents if given."""
     kinds = [event["kind"] for event in events]
     expected_sequence = [300, 301, 303, 311, 313]
     
@@ -374,30 +484,23 @@ def _validate_event_sequence(events: List[Dict[str, Any]]) -> None:
         previous_event = events[i-1]
         
         # Check if current event references previous event
-        content = json.loads(current_event["content"])
-        ref_field = _get_reference_field(current_event["kind"])
+        content = contents[i] if contents is not None else json_loads(current_event["content"])
+        ref_field = REFERENCE_FIELDS.get(current_event["kind"])
         
         if ref_field and ref_field in content:
             if content[ref_field] != previous_event["id"]:
                 raise ValidationError(f"Event {current_event['kind']} references wrong previous event")
 
 
-def _get_reference_field(kind: int) -> Optional[str]:
-    """Get the content field that references previous event."""
-    reference_fields = {
-        301: "product_ref",
-        303: "bid_ref", 
-        311: "bid_ref",
-        313: "payment_ref"
-    }
-    return reference_fields.get(kind)
-
-
-def _validate_state_transitions(events: List[Dict[str, Any]]) -> None:
-    """Validate transaction state transitions."""
+def _validate_state_transitions(events: List[Dict[str, Any]],
+                                contents: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Validate transaction state transitions, reusing parsed contents if given."""
+    if contents is None:
+        contents = [json_loads(event["content"]) for event in events[:2]]
+    
     # Basic validation - ensure amounts are consistent
-    listing_content = json.loads(events[0]["content"])  # kind-300
-    bid_content = json.loads(events[1]["content"])      # kind-301
+    listing_content = contents[0]  # kind-300
+    bid_content = contents[1]      # kind-301
     
     listing_price = listing_content["price_satoshis"]
     bid_amount = bid_content["bid_amount_satoshis"]
@@ -5,38 +5,130 @@ Complete command-line interface for the Decentralized Online Marketplace Protoco
 Integrates Lightning escrow, reputation system, and Nostr connectivity.
 """
 
+import itertools
 import json
 import time
-import sys
 import os
-from typing import Dict, List, Optional, Any
-from dataclasses import asdict
+from bisect import bisect_right
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass
 
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
-
-from domp.crypto import KeyPair, generate_pow_nonce
-from domp.events import ProductListing, BidSubmission, BidAcceptance, PaymentConfirmation, ReceiptConfirmation
+from domp.crypto import KeyPair
+from domp.events import ProductListing, BidSubmission, ReceiptConfirmation, json_loads
 from domp.lightning import LightningEscrowManager, MockLightningNode, EscrowState
-from domp.reputation import ReputationSystem, create_reputation_from_receipt_confirmation
-from domp.validation import validate_event
+from domp.reputation import (
+    DATACLASS_SLOTS, ReputationSystem, ReputationScore, create_reputation_from_receipt_confirmation
+)
+
+# Transaction and receipt labels shared across the CLI
+STATUS_PENDING = "pending"
+STATUS_COMPLETED = "completed"
+STATUS_RECEIVED = "received"
+CONDITION_AS_DESCRIBED = "as_described"
+
+# Lower bounds of the average, good and excellent rating bands (below 2.5 is poor)
+RATING_BAND_BOUNDS = (2.5, 3.5, 4.5)
+
+# Seconds a cached seller summary stays valid (recency and 30-day activity drift)
+REP_CACHE_TTL = 60
+
+# Transactions listed on the transactions menu (older ones stay in details view)
+RECENT_TRANSACTIONS_SHOWN = 50
+
+
+@dataclass(**DATACLASS_SLOTS)
+class ListingEntry:
+    """A stored listing: signed event, decoded content, seller keys and price text."""
+    event: Dict[str, Any]
+    content: Dict[str, Any]
+    seller_keypair: KeyPair
+    price_display: str  # "<sats> sats (<btc> BTC)", listings are immutable
+
+
+@dataclass(**DATACLASS_SLOTS)
+class TransactionEntry:
+    """A completed purchase made from this CLI."""
+    status: str
+    escrow: Any
+    receipt: Dict[str, Any]
+    listing: ListingEntry
 
 
 class DOOMPMarketplaceCLI:
     """Complete DOMP marketplace command-line interface."""
     
+    # Menu dispatch tables: menu name / choice -> method name
+    _MENU_VIEWS = {
+        "main": "show_main_menu",
+        "browse": "show_browse_menu",
+        "sell": "show_sell_menu",
+        "transactions": "show_transactions_menu",
+        "reputation": "show_reputation_menu",
+        "lightning": "show_lightning_menu",
+    }
+    _MENU_HANDLERS = {
+        "main": "handle_main_choice",
+        "browse": "handle_browse_choice",
+        "sell": "handle_sell_choice",
+        "transactions": "handle_transactions_choice",
+        "reputation": "handle_reputation_choice",
+        "lightning": "handle_lightning_choice",
+    }
+    _MAIN_MENU_TARGETS = {
+        "1": "browse",
+        "2": "sell",
+        "3": "transactions",
+        "4": "reputation",
+        "5": "lightning",
+    }
+    _SELL_ACTIONS = {
+        "1": "create_listing",
+        "2": "show_my_listings",
+        "3": "show_selling_analytics",
+    }
+    _TRANSACTIONS_ACTIONS = {
+        "1": "view_transaction_details",
+        "2": "check_lightning_escrows",
+    }
+    _REPUTATION_ACTIONS = {
+        "1": "view_seller_reputation",
+        "2": "show_reputation_analytics",
+        "3": "show_top_sellers",
+    }
+    _LIGHTNING_ACTIONS = {
+        "1": "create_invoice",
+        "2": "pay_invoice",
+        "3": "show_payment_history",
+        "4": "view_active_escrows",
+    }
+    
     def __init__(self):
         # Core components
         self.keypair: Optional[KeyPair] = None
+        self.pubkey_hex: Optional[str] = None
+        self.pubkey_short: Optional[str] = None
         self.lightning_node: Optional[MockLightningNode] = None
+        self._seller_nodes: Dict[str, MockLightningNode] = {}  # seller pubkey -> node
         self.escrow_manager = LightningEscrowManager()
         self.reputation_system = ReputationSystem()
         
         # Data storage (in production, this would be a database)
-        self.listings: Dict[str, Dict] = {}
+        self.listings: Dict[str, ListingEntry] = {}
+        self._listing_order: List[str] = []  # listing ids in display order
+        self._listings_by_pubkey: Dict[str, List[str]] = {}  # seller pubkey -> listing ids
+        self._inventory_sats: Dict[str, int] = {}  # seller pubkey -> summed listing prices
         self.bids: Dict[str, Dict] = {}
-        self.transactions: Dict[str, Dict] = {}
+        self.transactions: Dict[str, TransactionEntry] = {}
         self.my_transactions: List[str] = []
         
+        # Per-seller (expires_at, summary, trust) cache, invalidated when a score
+        # is added and expired after REP_CACHE_TTL so time-based factors refresh
+        self._rep_cache: Dict[str, Tuple[float, Dict, float]] = {}
+        
+        # Local IDs: session start time plus a counter, unique without a clock read per ID
+        self._session_id = int(time.time())
+        self._id_counter = itertools.count()
+        
         # CLI state
         self.running = True
         self.current_menu = "main"
@@ -50,7 +142,7 @@ class DOOMPMarketplaceCLI:
             self.create_identity()
         
         # Initialize Lightning node
-        self.lightning_node = MockLightningNode(f"user_{self.keypair.public_key_hex[:8]}")
+        self.lightning_node = MockLightningNode(f"user_{self.pubkey_hex[:8]}")
         
         # Load sample data for demo
         self.load_sample_data()
@@ -76,14 +168,24 @@ class DOOMPMarketplaceCLI:
         print("Lightning Escrow • Nostr Integration • Reputation System")
         print("=" * 70)
     
+    def _next_id(self, prefix: str) -> str:
+        """Return a new session-unique local identifier."""
+        return f"{prefix}_{self._session_id}_{next(self._id_counter)}"
+    
+    def set_keypair(self, keypair: KeyPair):
+        """Set the active identity and cache its hex pubkey forms."""
+        self.keypair = keypair
+        self.pubkey_hex = keypair.public_key_hex
+        self.pubkey_short = self.pubkey_hex[:16]
+    
     def load_identity(self) -> bool:
         """Load existing identity or return False to create new one."""
         if os.path.exists("domp_identity.json"):
             try:
-                with open("domp_identity.json", "r") as f:
-                    data = json.load(f)
-                    self.keypair = KeyPair(private_key=bytes.fromhex(data["private_key"]))
-                    print(f"🔑 Loaded identity: {self.keypair.public_key_hex[:16]}...")
+                with open("domp_identity.json", "rb") as f:
+                    data = json_loads(f.read())
+                    self.set_keypair(KeyPair(private_key=bytes.fromhex(data["private_key"])))
+                    print(f"🔑 Loaded identity: {self.pubkey_short}...")
                     return True
             except Exception as e:
                 print(f"❌ Error loading identity: {e}")
@@ -92,16 +194,20 @@ class DOOMPMarketplaceCLI:
     def create_identity(self):
         """Create a new DOMP identity."""
         print("\n🔑 Creating new DOMP identity...")
-        self.keypair = KeyPair()
+        self.set_keypair(KeyPair())
         
-        # Save identity
+        # Save identity (write to a temp file and rename so a crash never leaves a torn file)
         try:
-            with open("domp_identity.json", "w") as f:
+            tmp_path = "domp_identity.json.tmp"
+            with open(tmp_path, "w") as f:
                 json.dump({
                     "private_key": self.keypair.private_key_hex,
-                    "public_key": self.keypair.public_key_hex
+                    "public_key": self.pubkey_hex
                 }, f)
-            print(f"✅ Identity created: {self.keypair.public_key_hex[:16]}...")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, "domp_identity.json")
+            print(f"✅ Identity created: {self.pubkey_short}...")
         except Exception as e:
             print(f"❌ Error saving identity: {e}")
     
@@ -154,41 +260,68 @@ class DOOMPMarketplaceCLI:
                 price_satoshis=item["price_sats"],
                 category=item["category"],
                 seller_collateral_satoshis=item["price_sats"] // 10,
-                listing_id=f"item_{int(time.time())}_{len(self.listings)}"
+                listing_id=self._next_id("item")
             )
             listing.sign(item["seller"])
-            
-            self.listings[listing.id] = {
-                "event": listing.to_dict(),
-                "seller_keypair": item["seller"]
-            }
+            self._store_listing(listing, item["seller"])
         
         # Add sample reputation data
         self.add_sample_reputation()
         
         print(f"✅ Loaded {len(self.listings)} sample listings")
     
+    def _seller_node(self, seller_pubkey: str) -> MockLightningNode:
+        """Get the mock Lightning node for a seller, creating it on first use."""
+        node = self._seller_nodes.get(seller_pubkey)
+        if node is None:
+            node = MockLightningNode(f"seller_{seller_pubkey[:8]}")
+            self._seller_nodes[seller_pubkey] = node
+        return node
+    
+    def _store_listing(self, listing: ProductListing, seller_keypair: KeyPair):
+        """Store a signed listing with its decoded content and display strings, and index it."""
+        event = listing.to_dict()
+        content = json_loads(event["content"])
+        price = content["price_satoshis"]
+        self.listings[listing.id] = ListingEntry(
+            event=event,
+            content=content,
+            seller_keypair=seller_keypair,
+            price_display=f"{price:,} sats ({price/100_000_000:.3f} BTC)"
+        )
+        self._listing_order.append(listing.id)
+        self._listings_by_pubkey.setdefault(event["pubkey"], []).append(listing.id)
+        self._inventory_sats[event["pubkey"]] = self._inventory_sats.get(event["pubkey"], 0) + price
+    
+    def _listings_for(self, pubkey: str) -> List[Tuple[str, ListingEntry]]:
+        """Get (listing_id, listing) pairs for one seller via the pubkey index."""
+        listings = self.listings
+        return [(listing_id, listings[listing_id]) for listing_id in self._listings_by_pubkey.get(pubkey, ())]
+    
     def add_sample_reputation(self):
         """Add sample reputation data for demo sellers."""
         # This would normally come from processing historical receipt confirmations
         sample_scores = [
             {
-                "seller_pubkey": list(self.listings.values())[0]["seller_keypair"].public_key_hex,
+                "seller_pubkey": self.listings[self._listing_order[0]].event["pubkey"],
                 "scores": [(5, 80_000_000), (4, 50_000_000), (5, 120_000_000), (5, 30_000_000)]
             },
             {
-                "seller_pubkey": list(self.listings.values())[2]["seller_keypair"].public_key_hex,
+                "seller_pubkey": self.listings[self._listing_order[2]].event["pubkey"],
                 "scores": [(4, 40_000_000), (3, 25_000_000)]
             }
         ]
         
+        # One reviewer per review slot, shared across sellers
+        reviewer_count = max(len(seller_data["scores"]) for seller_data in sample_scores)
+        reviewers = [KeyPair().public_key_hex for _ in range(reviewer_count)]
+        
         for seller_data in sample_scores:
-            for rating, amount in seller_data["scores"]:
+            for reviewer_pubkey, (rating, amount) in zip(reviewers, seller_data["scores"]):
                 # Create a mock reputation score
-                from domp.reputation import ReputationScore
                 score = ReputationScore(
-                    transaction_id=f"sample_{int(time.time())}",
-                    reviewer_pubkey=KeyPair().public_key_hex,
+                    transaction_id=self._next_id("sample"),
+                    reviewer_pubkey=reviewer_pubkey,
                     reviewed_pubkey=seller_data["seller_pubkey"],
                     overall_rating=rating,
                     item_quality=rating,
@@ -199,24 +332,33 @@ class DOOMPMarketplaceCLI:
                     verified_purchase=True,
                     escrow_completed=True
                 )
-                self.reputation_system.add_reputation_score(score)
+                self.add_reputation_score(score)
+    
+    def add_reputation_score(self, score):
+        """Record a reputation score and drop the reviewed seller's cached summary."""
+        self.reputation_system.add_reputation_score(score)
+        self._rep_cache.pop(score.reviewed_pubkey, None)
+    
+    def _cached_rep(self, pubkey: str) -> Tuple[Dict, float]:
+        """Return (reputation summary, trust score) for a user, recomputing when stale."""
+        now = time.monotonic()
+        cached = self._rep_cache.get(pubkey)
+        if cached is None or cached[0] <= now:
+            cached = (
+                now + REP_CACHE_TTL,
+                self.reputation_system.get_reputation_summary(pubkey),
+                self.reputation_system.get_trust_score(pubkey)
+            )
+            self._rep_cache[pubkey] = cached
+        return cached[1], cached[2]
     
     def show_menu(self):
         """Display the current menu."""
         print("\n" + "=" * 50)
         
-        if self.current_menu == "main":
-            self.show_main_menu()
-        elif self.current_menu == "browse":
-            self.show_browse_menu()
-        elif self.current_menu == "sell":
-            self.show_sell_menu()
-        elif self.current_menu == "transactions":
-            self.show_transactions_menu()
-        elif self.current_menu == "reputation":
-            self.show_reputation_menu()
-        elif self.current_menu == "lightning":
-            self.show_lightning_menu()
+        view = self._MENU_VIEWS.get(self.current_menu)
+        if view:
+            getattr(self, view)()
     
     def show_main_menu(self):
         """Show the main menu."""
@@ -240,22 +382,22 @@ class DOOMPMarketplaceCLI:
             print("b. ⬅️  Back to main menu")
             return
         
-        # Display listings with reputation
+        # Display listings with reputation (built up and written in one go)
+        lines = []
         for i, (listing_id, listing_data) in enumerate(self.listings.items(), 1):
-            event = listing_data["event"]
-            content = json.loads(event["content"])
-            seller_pubkey = event["pubkey"]
+            content = listing_data.content
+            seller_pubkey = listing_data.event["pubkey"]
             
             # Get seller reputation
-            rep_summary = self.reputation_system.get_reputation_summary(seller_pubkey)
-            trust_score = self.reputation_system.get_trust_score(seller_pubkey)
+            rep_summary, trust_score = self._cached_rep(seller_pubkey)
             
-            print(f"\n{i}. 📦 {content['product_name']}")
-            print(f"   💰 Price: {content['price_satoshis']:,} sats ({content['price_satoshis']/100_000_000:.3f} BTC)")
-            print(f"   📝 {content['description'][:60]}...")
-            print(f"   👤 Seller: {seller_pubkey[:16]}... ({rep_summary.get('reliability', 'No Data')})")
-            print(f"   ⭐ Rating: {rep_summary.get('overall_score', 0.0):.1f}/5.0 ({rep_summary.get('total_transactions', 0)} transactions)")
-            print(f"   🎯 Trust: {trust_score:.3f}")
+            lines.append(f"\n{i}. 📦 {content['product_name']}")
+            lines.append(f"   💰 Price: {listing_data.price_display}")
+            lines.append(f"   📝 {content['description'][:60]}...")
+            lines.append(f"   👤 Seller: {seller_pubkey[:16]}... ({rep_summary.get('reliability', 'No Data')})")
+            lines.append(f"   ⭐ Rating: {rep_summary.get('overall_score', 0.0):.1f}/5.0 ({rep_summary.get('total_transactions', 0)} transactions)")
+            lines.append(f"   🎯 Trust: {trust_score:.3f}")
+        print("\n".join(lines))
         
         print(f"\n📋 Actions:")
         print("• Enter number to view/buy item")
@@ -278,9 +420,14 @@ class DOOMPMarketplaceCLI:
         if not self.my_transactions:
             print("📭 No transactions yet")
         else:
-            for i, tx_id in enumerate(self.my_transactions, 1):
-                tx = self.transactions.get(tx_id, {})
-                print(f"{i}. Transaction {tx_id[:16]}... - Status: {tx.get('status', 'Unknown')}")
+            # Only render the most recent transactions so redraws stay bounded
+            first = max(0, len(self.my_transactions) - RECENT_TRANSACTIONS_SHOWN)
+            if first:
+                print(f"... {first} earlier transactions")
+            for i in range(first, len(self.my_transactions)):
+                tx_id = self.my_transactions[i]
+                tx = self.transactions.get(tx_id)
+                print(f"{i + 1}. Transaction {tx_id[:16]}... - Status: {tx.status if tx else 'Unknown'}")
         
         print("\n📋 Actions:")
         print("1. 🔍 View Transaction Details")
@@ -293,12 +440,12 @@ class DOOMPMarketplaceCLI:
         print("=" * 50)
         
         # Show my reputation
-        my_rep = self.reputation_system.get_reputation_summary(self.keypair.public_key_hex)
+        my_rep, my_trust = self._cached_rep(self.pubkey_hex)
         print(f"📊 Your Reputation:")
         print(f"   Overall Score: {my_rep.get('overall_score', 0.0):.1f}/5.0")
         print(f"   Reliability: {my_rep.get('reliability', 'No Data')}")
         print(f"   Transactions: {my_rep.get('total_transactions', 0)}")
-        print(f"   Trust Score: {self.reputation_system.get_trust_score(self.keypair.public_key_hex):.3f}")
+        print(f"   Trust Score: {my_trust:.3f}")
         
         print(f"\n📋 Actions:")
         print("1. 🔍 View Seller Reputation")
@@ -327,31 +474,15 @@ class DOOMPMarketplaceCLI:
     
     def handle_choice(self, choice: str):
         """Handle user menu choice."""
-        if self.current_menu == "main":
-            self.handle_main_choice(choice)
-        elif self.current_menu == "browse":
-            self.handle_browse_choice(choice)
-        elif self.current_menu == "sell":
-            self.handle_sell_choice(choice)
-        elif self.current_menu == "transactions":
-            self.handle_transactions_choice(choice)
-        elif self.current_menu == "reputation":
-            self.handle_reputation_choice(choice)
-        elif self.current_menu == "lightning":
-            self.handle_lightning_choice(choice)
+        handler = self._MENU_HANDLERS.get(self.current_menu)
+        if handler:
+            getattr(self, handler)(choice)
     
     def handle_main_choice(self, choice: str):
         """Handle main menu choices."""
-        if choice == "1":
-            self.current_menu = "browse"
-        elif choice == "2":
-            self.current_menu = "sell"
-        elif choice == "3":
-            self.current_menu = "transactions"
-        elif choice == "4":
-            self.current_menu = "reputation"
-        elif choice == "5":
-            self.current_menu = "lightning"
+        target = self._MAIN_MENU_TARGETS.get(choice)
+        if target:
+            self.current_menu = target
         elif choice == "6":
             self.show_system_info()
         elif choice == "7":
@@ -370,79 +501,52 @@ class DOOMPMarketplaceCLI:
         else:
             print("❌ Invalid choice")
     
-    def handle_sell_choice(self, choice: str):
-        """Handle sell menu choices."""
+    def _handle_submenu_choice(self, choice: str, actions: Dict[str, str]):
+        """Run the action bound to a submenu choice, or go back on 'b'."""
         if choice.lower() == "b":
             self.current_menu = "main"
-        elif choice == "1":
-            self.create_listing()
-        elif choice == "2":
-            self.show_my_listings()
-        elif choice == "3":
-            self.show_selling_analytics()
+            return
+        action = actions.get(choice)
+        if action:
+            getattr(self, action)()
         else:
             print("❌ Invalid choice")
     
+    def handle_sell_choice(self, choice: str):
+        """Handle sell menu choices."""
+        self._handle_submenu_choice(choice, self._SELL_ACTIONS)
+    
     def handle_transactions_choice(self, choice: str):
         """Handle transactions menu choices."""
-        if choice.lower() == "b":
-            self.current_menu = "main"
-        elif choice == "1":
-            self.view_transaction_details()
-        elif choice == "2":
-            self.check_lightning_escrows()
-        else:
-            print("❌ Invalid choice")
+        self._handle_submenu_choice(choice, self._TRANSACTIONS_ACTIONS)
     
     def handle_reputation_choice(self, choice: str):
         """Handle reputation menu choices."""
-        if choice.lower() == "b":
-            self.current_menu = "main"
-        elif choice == "1":
-            self.view_seller_reputation()
-        elif choice == "2":
-            self.show_reputation_analytics()
-        elif choice == "3":
-            self.show_top_sellers()
-        else:
-            print("❌ Invalid choice")
+        self._handle_submenu_choice(choice, self._REPUTATION_ACTIONS)
     
     def handle_lightning_choice(self, choice: str):
         """Handle Lightning menu choices."""
-        if choice.lower() == "b":
-            self.current_menu = "main"
-        elif choice == "1":
-            self.create_invoice()
-        elif choice == "2":
-            self.pay_invoice()
-        elif choice == "3":
-            self.show_payment_history()
-        elif choice == "4":
-            self.view_active_escrows()
-        else:
-            print("❌ Invalid choice")
+        self._handle_submenu_choice(choice, self._LIGHTNING_ACTIONS)
     
     def view_item(self, item_index: int):
         """View detailed item information and purchase options."""
-        listing_items = list(self.listings.items())
-        if 0 <= item_index < len(listing_items):
-            listing_id, listing_data = listing_items[item_index]
-            event = listing_data["event"]
-            content = json.loads(event["content"])
-            seller_pubkey = event["pubkey"]
+        if 0 <= item_index < len(self._listing_order):
+            listing_id = self._listing_order[item_index]
+            listing_data = self.listings[listing_id]
+            content = listing_data.content
+            seller_pubkey = listing_data.event["pubkey"]
             
             print("\n" + "=" * 60)
             print("📦 ITEM DETAILS")
             print("=" * 60)
             print(f"🏷️  Name: {content['product_name']}")
             print(f"📝 Description: {content['description']}")
-            print(f"💰 Price: {content['price_satoshis']:,} sats ({content['price_satoshis']/100_000_000:.3f} BTC)")
+            print(f"💰 Price: {listing_data.price_display}")
             print(f"🏷️  Category: {content.get('category', 'Unknown')}")
             print(f"🛡️  Seller Collateral: {content.get('seller_collateral_satoshis', 0):,} sats")
             
             # Seller reputation
-            rep_summary = self.reputation_system.get_reputation_summary(seller_pubkey)
-            trust_score = self.reputation_system.get_trust_score(seller_pubkey)
+            rep_summary, trust_score = self._cached_rep(seller_pubkey)
             print(f"\n👤 Seller Information:")
             print(f"   Pubkey: {seller_pubkey[:16]}...")
             print(f"   Reputation: {rep_summary.get('reliability', 'No Data')}")
@@ -464,10 +568,9 @@ class DOOMPMarketplaceCLI:
             elif choice == "3":
                 return
     
-    def place_bid(self, listing_id: str, listing_data: dict):
+    def place_bid(self, listing_id: str, listing_data: ListingEntry):
         """Place a bid on an item."""
-        event = listing_data["event"]
-        content = json.loads(event["content"])
+        content = listing_data.content
         
         print(f"\n💸 PLACE BID ON: {content['product_name']}")
         print(f"💰 Listed Price: {content['price_satoshis']:,} sats")
@@ -497,10 +600,12 @@ class DOOMPMarketplaceCLI:
             print(f"\n⏳ Waiting for seller acceptance...")
             
             # Store bid
+            bid_event = bid.to_dict()
             self.bids[bid.id] = {
-                "event": bid.to_dict(),
+                "event": bid_event,
+                "content": json_loads(bid_event["content"]),
                 "listing_id": listing_id,
-                "status": "pending"
+                "status": STATUS_PENDING
             }
             
             # Simulate seller acceptance for demo
@@ -509,30 +614,29 @@ class DOOMPMarketplaceCLI:
         except Exception as e:
             print(f"❌ Error placing bid: {e}")
     
-    def simulate_bid_acceptance(self, bid_id: str, listing_data: dict):
+    def simulate_bid_acceptance(self, bid_id: str, listing_data: ListingEntry):
         """Simulate seller accepting the bid for demo purposes."""
         print(f"\n🎉 Seller accepted your bid!")
         
         # Create escrow and invoices
         bid_data = self.bids[bid_id]
-        bid_event = bid_data["event"]
-        listing_event = listing_data["event"]
+        listing_event = listing_data.event
         
-        bid_content = json.loads(bid_event["content"])
-        listing_content = json.loads(listing_event["content"])
+        bid_content = bid_data["content"]
+        listing_content = listing_data.content
         
         # Create Lightning escrow
         escrow = self.escrow_manager.create_escrow(
             transaction_id=f"tx_{bid_id[:8]}",
-            buyer_pubkey=self.keypair.public_key_hex,
+            buyer_pubkey=self.pubkey_hex,
             seller_pubkey=listing_event["pubkey"],
             purchase_amount_sats=bid_content["bid_amount_satoshis"],
             buyer_collateral_sats=bid_content["buyer_collateral_satoshis"],
             seller_collateral_sats=listing_content.get("seller_collateral_satoshis", 0)
         )
         
-        # Create seller Lightning node
-        seller_node = MockLightningNode("seller_node")
+        # Seller's Lightning node (one per seller, reused across bids)
+        seller_node = self._seller_node(listing_event["pubkey"])
         
         # Generate invoices
         purchase_invoice = seller_node.create_invoice(
@@ -574,7 +678,7 @@ class DOOMPMarketplaceCLI:
             )
             
             # Simulate seller paying their collateral
-            listing_content = json.loads(listing_data["event"]["content"])
+            listing_content = listing_data.content
             seller_collateral_sats = listing_content.get("seller_collateral_satoshis", 0)
             seller_collateral_hash = None
             
@@ -619,8 +723,8 @@ class DOOMPMarketplaceCLI:
         print(f"\n📦 Simulating shipping process...")
         time.sleep(1)
         
-        listing_event = listing_data["event"]
-        listing_content = json.loads(listing_event["content"])
+        listing_event = listing_data.event
+        listing_content = listing_data.content
         
         print(f"🚚 Item shipped: {listing_content['product_name']}")
         print(f"📧 Tracking: TRK{escrow.transaction_id[:8].upper()}")
@@ -630,10 +734,10 @@ class DOOMPMarketplaceCLI:
             # Create receipt confirmation
             receipt = ReceiptConfirmation(
                 payment_ref=escrow.transaction_id,
-                status="received",
+                status=STATUS_RECEIVED,
                 rating=5,
                 feedback=f"Excellent transaction! {listing_content['product_name']} received as described.",
-                item_condition="as_described",
+                item_condition=CONDITION_AS_DESCRIBED,
                 shipping_rating=5,
                 communication_rating=5,
                 would_buy_again=True
@@ -654,20 +758,20 @@ class DOOMPMarketplaceCLI:
                     receipt.to_dict(),
                     {
                         "seller_pubkey": listing_event["pubkey"],
-                        "amount_sats": json.loads(listing_event["content"])["price_satoshis"]
+                        "amount_sats": listing_content["price_satoshis"]
                     }
                 )
-                self.reputation_system.add_reputation_score(rep_score)
+                self.add_reputation_score(rep_score)
                 
                 print(f"🏆 Reputation updated for seller")
                 
                 # Store transaction
-                self.transactions[escrow.transaction_id] = {
-                    "status": "completed",
-                    "escrow": escrow,
-                    "receipt": receipt.to_dict(),
-                    "listing": listing_data
-                }
+                self.transactions[escrow.transaction_id] = TransactionEntry(
+                    status=STATUS_COMPLETED,
+                    escrow=escrow,
+                    receipt=receipt.to_dict(),
+                    listing=listing_data
+                )
                 self.my_transactions.append(escrow.transaction_id)
                 
             else:
@@ -704,15 +808,12 @@ class DOOMPMarketplaceCLI:
                 price_satoshis=price_sats,
                 category=category,
                 seller_collateral_satoshis=price_sats // 10,  # 10% collateral
-                listing_id=f"my_item_{int(time.time())}"
+                listing_id=self._next_id("my_item")
             )
             listing.sign(self.keypair)
             
             # Store listing
-            self.listings[listing.id] = {
-                "event": listing.to_dict(),
-                "seller_keypair": self.keypair
-            }
+            self._store_listing(listing, self.keypair)
             
             print(f"\n✅ Listing created successfully!")
             print(f"   Listing ID: {listing.id[:16]}...")
@@ -728,14 +829,14 @@ class DOOMPMarketplaceCLI:
         """Show system information."""
         print(f"\n📊 DOMP SYSTEM INFORMATION")
         print("=" * 50)
-        print(f"🔑 Your Identity: {self.keypair.public_key_hex[:16]}...")
+        print(f"🔑 Your Identity: {self.pubkey_short}...")
         print(f"⚡ Lightning Balance: {self.lightning_node.get_balance():,} sats")
         print(f"📦 Total Listings: {len(self.listings)}")
         print(f"💸 Your Transactions: {len(self.my_transactions)}")
-        print(f"🏆 Active Escrows: {len([e for e in self.escrow_manager.escrows.values() if e.state == EscrowState.ACTIVE])}")
+        print(f"🏆 Active Escrows: {self.escrow_manager.active_escrow_count()}")
         
         # Your reputation
-        my_rep = self.reputation_system.get_reputation_summary(self.keypair.public_key_hex)
+        my_rep, _ = self._cached_rep(self.pubkey_hex)
         print(f"⭐ Your Reputation: {my_rep['overall_score']:.1f}/5.0 ({my_rep['total_transactions']} transactions)")
         
         print(f"\n🔧 Protocol Features:")
@@ -752,10 +853,8 @@ class DOOMPMarketplaceCLI:
         print(f"\n🏆 TOP SELLERS")
         print("=" * 40)
         
-        # Get all seller pubkeys
-        seller_pubkeys = set()
-        for listing_data in self.listings.values():
-            seller_pubkeys.add(listing_data["event"]["pubkey"])
+        # Every seller with a listing is a key of the pubkey index
+        seller_pubkeys = list(self._listings_by_pubkey)
         
         if not seller_pubkeys:
             print("📭 No sellers found")
@@ -763,16 +862,13 @@ class DOOMPMarketplaceCLI:
             return
         
         # Compare sellers
-        comparison = self.reputation_system.compare_sellers(list(seller_pubkeys))
+        comparison = self.reputation_system.compare_sellers(seller_pubkeys, include_trust=True)
         
         for i, seller in enumerate(comparison, 1):
             if seller["total_transactions"] > 0:
-                trust_score = self.reputation_system.get_trust_score(
-                    next(pubkey for pubkey in seller_pubkeys if pubkey.startswith(seller["pubkey"][:16]))
-                )
                 print(f"{i}. {seller['reliability']} - {seller['overall_score']:.1f}⭐")
                 print(f"   Pubkey: {seller['pubkey']}")
-                print(f"   Trust: {trust_score:.3f} | Transactions: {seller['total_transactions']}")
+                print(f"   Trust: {seller['trust_score']:.3f} | Transactions: {seller['total_transactions']}")
                 print(f"   Volume: {seller['total_volume_btc']:.3f} BTC")
                 print()
         
@@ -792,7 +888,7 @@ class DOOMPMarketplaceCLI:
             for escrow in active_escrows:
                 print(f"🔒 Escrow: {escrow.transaction_id}")
                 print(f"   Amount: {escrow.purchase_amount_sats:,} sats")
-                print(f"   State: {escrow.state.value}")
+                print(f"   State: {escrow.state.label}")
                 print(f"   Expires: {time.ctime(escrow.expires_at)}")
                 print()
         
@@ -803,8 +899,7 @@ class DOOMPMarketplaceCLI:
         print(f"\n👤 SELLER PROFILE")
         print("=" * 40)
         
-        rep_summary = self.reputation_system.get_reputation_summary(seller_pubkey)
-        trust_score = self.reputation_system.get_trust_score(seller_pubkey)
+        rep_summary, trust_score = self._cached_rep(seller_pubkey)
         
         print(f"🔑 Pubkey: {seller_pubkey}")
         print(f"⭐ Overall Rating: {rep_summary.get('overall_score', 0.0):.1f}/5.0")
@@ -827,13 +922,12 @@ class DOOMPMarketplaceCLI:
         print(f"   📈 Recent Activity: {rep_summary.get('recent_activity', 0)} (last 30 days)")
         
         # Show their listings
-        seller_listings = [(id, data) for id, data in self.listings.items() 
-                          if data["event"]["pubkey"] == seller_pubkey]
+        seller_listings = self._listings_for(seller_pubkey)
         
         if seller_listings:
             print(f"\n📦 Current Listings ({len(seller_listings)}):")
             for i, (listing_id, listing_data) in enumerate(seller_listings[:3], 1):
-                content = json.loads(listing_data["event"]["content"])
+                content = listing_data.content
                 print(f"   {i}. {content['product_name']} - {content['price_satoshis']:,} sats")
         
         input("\nPress Enter to continue...")
@@ -843,14 +937,13 @@ class DOOMPMarketplaceCLI:
         print(f"\n📦 MY ACTIVE LISTINGS")
         print("=" * 40)
         
-        my_listings = [(id, data) for id, data in self.listings.items() 
-                      if data["event"]["pubkey"] == self.keypair.public_key_hex]
+        my_listings = self._listings_for(self.pubkey_hex)
         
         if not my_listings:
             print("📭 No active listings")
         else:
             for i, (listing_id, listing_data) in enumerate(my_listings, 1):
-                content = json.loads(listing_data["event"]["content"])
+                content = listing_data.content
                 print(f"{i}. 📦 {content['product_name']}")
                 print(f"   💰 Price: {content['price_satoshis']:,} sats")
                 print(f"   📝 {content['description'][:50]}...")
@@ -864,25 +957,23 @@ class DOOMPMarketplaceCLI:
         print(f"\n📊 SELLING ANALYTICS")
         print("=" * 40)
         
-        my_listings = [(id, data) for id, data in self.listings.items() 
-                      if data["event"]["pubkey"] == self.keypair.public_key_hex]
+        listing_count = len(self._listings_by_pubkey.get(self.pubkey_hex, ()))
         
-        my_rep = self.reputation_system.get_reputation_summary(self.keypair.public_key_hex)
+        my_rep, my_trust = self._cached_rep(self.pubkey_hex)
         
         print(f"📈 Performance Summary:")
-        print(f"   📦 Active Listings: {len(my_listings)}")
+        print(f"   📦 Active Listings: {listing_count}")
         print(f"   ⭐ Seller Rating: {my_rep.get('overall_score', 0.0):.1f}/5.0")
         print(f"   💰 Total Sales Volume: {my_rep.get('total_volume_btc', 0.0):.3f} BTC")
         print(f"   📊 Total Transactions: {my_rep.get('total_transactions', 0)}")
-        print(f"   🎯 Trust Score: {self.reputation_system.get_trust_score(self.keypair.public_key_hex):.3f}")
+        print(f"   🎯 Trust Score: {my_trust:.3f}")
         
-        if my_listings:
-            total_value = sum(json.loads(data["event"]["content"])["price_satoshis"] 
-                            for _, data in my_listings)
+        if listing_count:
+            total_value = self._inventory_sats[self.pubkey_hex]
             print(f"   💵 Inventory Value: {total_value:,} sats ({total_value/100_000_000:.3f} BTC)")
         
         print(f"\n💡 Recommendations:")
-        if len(my_listings) == 0:
+        if listing_count == 0:
             print("   • Create your first listing to start selling")
         elif my_rep.get('total_transactions', 0) == 0:
             print("   • Complete your first sale to build reputation")
@@ -904,18 +995,15 @@ class DOOMPMarketplaceCLI:
         
         print(f"📊 Your Transactions:")
         for i, tx_id in enumerate(self.my_transactions, 1):
-            tx_data = self.transactions.get(tx_id, {})
+            tx_data = self.transactions.get(tx_id)
             print(f"{i}. Transaction: {tx_id[:16]}...")
-            print(f"   Status: {tx_data.get('status', 'Unknown')}")
+            print(f"   Status: {tx_data.status if tx_data else 'Unknown'}")
             
-            if 'escrow' in tx_data:
-                escrow = tx_data['escrow']
+            if tx_data:
+                escrow = tx_data.escrow
                 print(f"   Amount: {escrow.purchase_amount_sats:,} sats")
-                print(f"   Escrow State: {escrow.state.value}")
-            
-            if 'listing' in tx_data:
-                listing_content = json.loads(tx_data['listing']['event']['content'])
-                print(f"   Item: {listing_content['product_name']}")
+                print(f"   Escrow State: {escrow.state.label}")
+                print(f"   Item: {tx_data.listing.content['product_name']}")
             print()
         
         input("Press Enter to continue...")
@@ -931,14 +1019,9 @@ class DOOMPMarketplaceCLI:
             input("Press Enter to continue...")
             return
         
-        # Find matching sellers
-        matches = []
-        for listing_data in self.listings.values():
-            pubkey = listing_data["event"]["pubkey"]
-            if seller_pubkey.lower() in pubkey.lower():
-                matches.append(pubkey)
-        
-        matches = list(set(matches))  # Remove duplicates
+        # Find matching sellers (index keys are already unique)
+        needle = seller_pubkey.lower()
+        matches = [pubkey for pubkey in self._listings_by_pubkey if needle in pubkey.lower()]
         
         if not matches:
             print(f"❌ No sellers found matching '{seller_pubkey}'")
@@ -948,7 +1031,7 @@ class DOOMPMarketplaceCLI:
         else:
             print(f"📋 Multiple matches found:")
             for i, pubkey in enumerate(matches, 1):
-                rep = self.reputation_system.get_reputation_summary(pubkey)
+                rep, _ = self._cached_rep(pubkey)
                 print(f"{i}. {pubkey[:16]}... - {rep.get('reliability', 'No Data')}")
             
             choice = input("Select seller (number): ").strip()
@@ -965,38 +1048,42 @@ class DOOMPMarketplaceCLI:
         print("=" * 40)
         
         # Overall marketplace stats
-        all_sellers = set(data["event"]["pubkey"] for data in self.listings.values())
+        all_sellers = self._listings_by_pubkey.keys()
         
         print(f"🌐 Marketplace Overview:")
         print(f"   👥 Total Sellers: {len(all_sellers)}")
         print(f"   📦 Total Listings: {len(self.listings)}")
         
-        # Reputation distribution
-        reputation_data = []
+        # Reputation distribution, gathered in one pass over sellers with data
+        rated_sellers = 0
+        score_total = 0.0
+        transaction_total = 0
+        total_volume = 0.0
+        band_counts = [0, 0, 0, 0]  # poor, average, good, excellent
         for seller_pubkey in all_sellers:
-            rep = self.reputation_system.get_reputation_summary(seller_pubkey)
-            reputation_data.append(rep)
-        
-        # Calculate averages
-        with_data = [r for r in reputation_data if r.get('total_transactions', 0) > 0]
-        
-        if with_data:
-            avg_rating = sum(r.get('overall_score', 0) for r in with_data) / len(with_data)
-            avg_transactions = sum(r.get('total_transactions', 0) for r in with_data) / len(with_data)
-            total_volume = sum(r.get('total_volume_btc', 0) for r in with_data)
+            rep, _ = self._cached_rep(seller_pubkey)
+            transactions = rep.get('total_transactions', 0)
+            if transactions > 0:
+                score = rep.get('overall_score', 0)
+                rated_sellers += 1
+                score_total += score
+                transaction_total += transactions
+                total_volume += rep.get('total_volume_btc', 0)
+                band_counts[bisect_right(RATING_BAND_BOUNDS, score)] += 1
+        
+        if rated_sellers:
+            avg_rating = score_total / rated_sellers
+            avg_transactions = transaction_total / rated_sellers
             
             print(f"\n📈 Reputation Statistics:")
             print(f"   ⭐ Average Rating: {avg_rating:.1f}/5.0")
             print(f"   📊 Average Transactions per Seller: {avg_transactions:.1f}")
             print(f"   💰 Total Marketplace Volume: {total_volume:.3f} BTC")
-            print(f"   🏆 Sellers with Data: {len(with_data)}/{len(all_sellers)}")
+            print(f"   🏆 Sellers with Data: {rated_sellers}/{len(all_sellers)}")
         
         # Rating distribution
         print(f"\n🏆 Rating Distribution:")
-        excellent = sum(1 for r in with_data if r.get('overall_score', 0) >= 4.5)
-        good = sum(1 for r in with_data if 3.5 <= r.get('overall_score', 0) < 4.5)
-        average = sum(1 for r in with_data if 2.5 <= r.get('overall_score', 0) < 3.5)
-        poor = sum(1 for r in with_data if r.get('overall_score', 0) < 2.5)
+        poor, average, good, excellent = band_counts
         
         print(f"   🌟 Excellent (4.5+): {excellent}")
         print(f"   👍 Good (3.5-4.4): {good}")
@@ -1100,20 +1187,16 @@ class DOOMPMarketplaceCLI:
         else:
             print(f"⚡ All Escrows:")
             for escrow_id, escrow in self.escrow_manager.escrows.items():
-                print(f"   {escrow_id}: {escrow.state.value}")
+                print(f"   {escrow_id}: {escrow.state.label}")
                 print(f"      Amount: {escrow.purchase_amount_sats:,} sats")
-                if escrow.state.value == "active":
+                if escrow.state == EscrowState.ACTIVE:
                     remaining = max(0, escrow.expires_at - int(time.time()))
                     print(f"      Time remaining: {remaining} seconds")
                 print()
         
-        # Show active escrows
-        active_escrows = [e for e in self.escrow_manager.escrows.values() 
-                         if e.state.value == "active"]
-        
         print(f"📊 Summary:")
         print(f"   Total Escrows: {len(self.escrow_manager.escrows)}")
-        print(f"   Active Escrows: {len(active_escrows)}")
+        print(f"   Active Escrows: {self.escrow_manager.active_escrow_count()}")
         
         input("Press Enter to continue...")
 
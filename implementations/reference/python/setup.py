@@ -24,6 +24,9 @@ setup(
             "lnd-grpc-client>=0.3.0",
             "grpcio>=1.50.0",
         ],
+        "speedups": [
+            "orjson>=3.6.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
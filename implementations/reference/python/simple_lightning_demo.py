@@ -6,8 +6,6 @@ Focuses on the core escrow functionality without PoW validation issues.
 
 import json
 import time
-import sys
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
 
 from domp.crypto import KeyPair
 from domp.lightning import LightningEscrowManager, MockLightningNode, EscrowState
@@ -82,7 +80,7 @@ def main():
     print(f"  Transaction ID: {escrow.transaction_id}")
     print(f"  Payment Hash: {escrow.payment_hash[:16]}...")
     print(f"  Payment Secret: {escrow.payment_preimage[:16]}... (HIDDEN)")
-    print(f"  State: {escrow.state.value}")
+    print(f"  State: {escrow.state.label}")
     print(f"  Timeout: {escrow.timeout_blocks} blocks")
     print(f"  Expires: {time.ctime(escrow.expires_at)}")
     
@@ -167,7 +165,7 @@ def main():
     )
     
     print(f"🔒 Escrow funding result: {escrow_funded}")
-    print(f"🔒 Escrow state: {escrow.state.value}")
+    print(f"🔒 Escrow state: {escrow.state.label}")
     
     if escrow.state == EscrowState.ACTIVE:
         print("✅ ESCROW IS NOW ACTIVE!")
@@ -214,10 +212,10 @@ def main():
     
     if revealed_preimage:
         print(f"🔑 Payment preimage revealed: {revealed_preimage[:16]}...")
-        print(f"🔒 Escrow state: {escrow.state.value}")
+        print(f"🔒 Escrow state: {escrow.state.label}")
     else:
         print("❌ Failed to release payment - escrow may not be active")
-        print(f"🔒 Current escrow state: {escrow.state.value}")
+        print(f"🔒 Current escrow state: {escrow.state.label}")
         return
     
     # In real Lightning Network:
@@ -6,8 +6,6 @@ Demonstrates trustless marketplace transaction from listing to completion.
 
 import json
 import time
-import sys
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
 
 from domp.crypto import KeyPair
 from domp.events import ProductListing, BidSubmission, BidAcceptance, PaymentConfirmation, ReceiptConfirmation
@@ -150,7 +148,7 @@ def main():
     print(f"  Seller Collateral: {escrow.seller_collateral_sats:,} sats")
     print(f"  Payment Hash: {escrow.payment_hash[:16]}...")
     print(f"  Payment Preimage: {escrow.payment_preimage[:16]}... (SECRET)")
-    print(f"  State: {escrow.state.value}")
+    print(f"  State: {escrow.state.label}")
     print(f"  Timeout: {escrow.timeout_blocks} blocks (~{escrow.timeout_blocks * 10} minutes)")
     
     # ========================================
@@ -223,7 +221,7 @@ def main():
     )
     
     print(f"🔒 Escrow funded: {escrow_funded}")
-    print(f"🔒 Escrow state: {escrow.state.value}")
+    print(f"🔒 Escrow state: {escrow.state.label}")
     
     # Create payment confirmation event
     payment_confirmation = PaymentConfirmation(
@@ -314,7 +312,7 @@ def main():
     preimage = escrow_manager.release_payment(escrow.transaction_id)
     
     print(f"🔑 Payment preimage revealed: {preimage[:16]}...")
-    print(f"🔒 Escrow state: {escrow.state.value}")
+    print(f"🔒 Escrow state: {escrow.state.label}")
     
     # In real Lightning Network:
     # 1. Seller uses preimage to claim HTLC payment
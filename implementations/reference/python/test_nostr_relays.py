@@ -7,8 +7,6 @@ Validates that our protocol events work in the real Nostr ecosystem.
 import asyncio
 import json
 import time
-import sys
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
 
 from nostr_sdk import Keys, Client, EventBuilder, Kind, Tag, Event, NostrSigner, SecretKey
 from domp.crypto import KeyPair, generate_pow_nonce
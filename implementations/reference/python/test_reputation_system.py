@@ -6,8 +6,6 @@ Demonstrates decentralized reputation scoring with complete marketplace transact
 
 import json
 import time
-import sys
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
 
 from domp.crypto import KeyPair
 from domp.events import ProductListing, BidSubmission, BidAcceptance, PaymentConfirmation, ReceiptConfirmation
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 
 import json
-import sys
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
 
 from domp.crypto import compute_event_id
 
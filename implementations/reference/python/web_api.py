@@ -11,13 +11,10 @@ from pydantic import BaseModel
 import json
 import asyncio
 import time
-import sys
 import os
 from typing import List, Dict, Optional, Any
 from dataclasses import asdict
 
-sys.path.insert(0, '/home/lando/projects/fromperdomp-poc/implementations/reference/python')
-
 from domp.crypto import KeyPair, generate_pow_nonce
 from domp.events import ProductListing, BidSubmission, BidAcceptance, PaymentConfirmation, ReceiptConfirmation
 from domp.lightning import LightningEscrowManager, MockLightningNode, EscrowState
@@ -487,7 +484,7 @@ async def get_transactions():
                 "amount_sats": tx_data["escrow"].purchase_amount_sats,
                 "amount_btc": tx_data["escrow"].purchase_amount_sats / 100_000_000,
                 "created_at": tx_data["created_at"],
-                "escrow_state": tx_data["escrow"].state.value
+                "escrow_state": tx_data["escrow"].state.label
             })
     
     return {"transactions": transactions}
@@ -497,18 +494,16 @@ async def get_transactions():
 async def get_top_sellers():
     """Get top sellers by reputation."""
     seller_pubkeys = set(data["event"]["pubkey"] for data in app_state.listings.values())
-    comparison = app_state.reputation_system.compare_sellers(list(seller_pubkeys))
+    comparison = app_state.reputation_system.compare_sellers(list(seller_pubkeys), top_k=10, include_trust=True)
+    
+    # Summaries carry a shortened pubkey; map it back once instead of scanning per row
+    pubkey_by_prefix = {pubkey[:16]: pubkey for pubkey in seller_pubkeys}
     
     sellers = []
-    for seller in comparison[:10]:  # Top 10
+    for seller in comparison:  # Top 10
         if seller.get("total_transactions", 0) > 0:
-            # Find the actual pubkey
-            actual_pubkey = next(
-                (pubkey for pubkey in seller_pubkeys if pubkey.startswith(seller["pubkey"][:16])),
-                None
-            )
+            actual_pubkey = pubkey_by_prefix.get(seller["pubkey"][:16])
             if actual_pubkey:
-                trust_score = app_state.reputation_system.get_trust_score(actual_pubkey)
                 sellers.append({
                     "pubkey": actual_pubkey,
                     "pubkey_short": seller["pubkey"],
@@ -516,7 +511,7 @@ async def get_top_sellers():
                     "overall_score": seller["overall_score"],
                     "total_transactions": seller["total_transactions"],
                     "total_volume_btc": seller["total_volume_btc"],
-                    "trust_score": trust_score
+                    "trust_score": seller["trust_score"]
                 })
     
     return {"sellers": sellers}